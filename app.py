@@ -1,19 +1,143 @@
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, request, send_file
 from flask_cors import CORS
 from datetime import datetime
 import json
 import os
+import re
 import time
 import subprocess
 import sys
+import fcntl
 import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import metrics
+from snapshots import SharedSnapshotFile, SnapshotStore, VersionConflict
+from history import RankingHistory
+from scheduler import MarketScheduler
 
 app = Flask(__name__)
 CORS(app)
 
-# 초기 테스트 데이터 제거
-stocks_data = []  # 빈 배열로 시작
-last_update = None
+# 스크래퍼 실행 설정
+SCRAPER_MODE = os.environ.get('SCRAPER_MODE', 'inprocess')  # inprocess | subprocess
+SCRAPER_TIMEOUT = int(os.environ.get('SCRAPER_TIMEOUT', '120'))
+SCRAPER_INTERVAL = int(os.environ.get('SCRAPER_INTERVAL', '15'))
+SSE_HEARTBEAT = int(os.environ.get('SSE_HEARTBEAT', '20'))
+# 워커당 동시 SSE 연결 상한 - 연결마다 gthread 스레드를 하나씩 점유하므로
+# 기본값은 스레드의 절반 (나머지는 /api/stocks, /api/status 등 일반 요청용)
+SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', max(1, int(os.environ.get('GUNICORN_THREADS', '32')) // 2)))
+HISTORY_MAX_ROWS = int(os.environ.get('HISTORY_MAX_ROWS', '100000'))
+MAX_PAGE_LIMIT = int(os.environ.get('MAX_PAGE_LIMIT', '100'))  # /api/stocks?limit= 상한
+NEWS_NAME_MAX_LEN = int(os.environ.get('NEWS_NAME_MAX_LEN', '40'))  # /api/news/<종목명> 길이 상한
+
+# 멀티 워커 공유 스냅샷 (비어 있으면 프로세스 메모리만 사용)
+SNAPSHOT_SHARED_FILE = os.environ.get('SNAPSHOT_SHARED_FILE', '')
+SNAPSHOT_SLOT_MB = int(os.environ.get('SNAPSHOT_SLOT_MB', '4'))
+SNAPSHOT_SYNC_INTERVAL = float(os.environ.get('SNAPSHOT_SYNC_INTERVAL', '0.2'))
+SCRAPER_LOCK_FILE = os.environ.get('SCRAPER_LOCK_FILE', '/tmp/hot-cheetos-scraper.lock')
+METRICS_FILE = os.environ.get('METRICS_FILE', '')  # 스크래퍼 워커가 내보낸 메트릭 (멀티 워커용)
+
+# 토스 랭킹 (첫 번째가 기본 랭킹 = /api/stocks, 나머지는 /api/rankings/<key>)
+TOSS_RANKINGS = [k.strip() for k in os.environ.get('TOSS_RANKINGS', 'heavy_soar').split(',') if k.strip()] or ['heavy_soar']
+PRIMARY_RANKING = TOSS_RANKINGS[0]
+RANKING_KEY_RE = re.compile(r'^[a-z0-9_]{1,32}$')  # 공유 파일 경로에도 쓰이므로 제한
+
+scraper_leader = threading.Event()  # 이 프로세스가 스크래퍼를 돌리는지
+
+ranking_history = RankingHistory(HISTORY_MAX_ROWS)  # 사이클별 순위/가격/등락률 이력
+
+_history_key = {'last': None}
+_history_lock = threading.Lock()
+
+def _record_history(snapshot):
+    """이 워커가 새 스냅샷을 처음 반영할 때 이력 기록 (요약만 바뀐 버전은 제외)
+    
+    스냅샷은 이미 교체된 뒤라 이력 기록 실패가 발행/요청 실패로 번지지 않게 함
+    크롤링 실패 시의 테스트 데이터(source != 'crawl')는 가짜 가격이라 기록하지 않음
+    """
+    if snapshot.source != 'crawl':
+        return
+    try:
+        key = tuple((s.get('name'), s.get('rank'), s.get('price'), s.get('rate')) for s in snapshot.stocks)
+        with _history_lock:
+            if key == _history_key['last']:
+                return
+            _history_key['last'] = key
+        ranking_history.record(snapshot.stocks, time.time())
+    except Exception as e:
+        print(f"⚠️ 이력 기록 실패 (v{snapshot.version}): {e}", flush=True)
+
+# 빈 스냅샷(버전 0)으로 시작, 저장 시 한 번만 직렬화/압축
+snapshot_store = SnapshotStore(
+    shared=SharedSnapshotFile(SNAPSHOT_SHARED_FILE, SNAPSHOT_SLOT_MB * 1024 * 1024) if SNAPSHOT_SHARED_FILE else None,
+    on_change=_record_history
+)
+
+# 기본 외 랭킹별 스냅샷 (공유 모드면 랭킹마다 '<SNAPSHOT_SHARED_FILE>.<key>' 파일)
+ranking_stores = {}
+_ranking_stores_lock = threading.Lock()
+
+def get_ranking_store(key, create=False):
+    """랭킹 키 → 스냅샷 저장소 (기본 랭킹은 snapshot_store, 없으면 None)
+    
+    TOSS_RANKINGS에 설정된 키만 - 임의 키로 저장소(공유 모드면 mmap 파일)가 늘지 않게 함
+    다른 워커가 만든 랭킹은 공유 파일이 있으면 열어서 따라감
+    """
+    if key == PRIMARY_RANKING:
+        return snapshot_store
+    if key not in TOSS_RANKINGS or not RANKING_KEY_RE.match(key):
+        return None
+    
+    with _ranking_stores_lock:
+        store = ranking_stores.get(key)
+        if store is None:
+            path = f"{SNAPSHOT_SHARED_FILE}.{key}" if SNAPSHOT_SHARED_FILE else None
+            if not create and not (path and os.path.exists(path)):
+                return None
+            store = ranking_stores[key] = SnapshotStore(
+                shared=SharedSnapshotFile(path, SNAPSHOT_SLOT_MB * 1024 * 1024) if path else None
+            )
+    return store
+
+market_phase = MarketScheduler(SCRAPER_INTERVAL).phase  # 상태 표시용 (현재 장 구간)
+
+def _after_store(snapshot):
+    """새 스냅샷 반영 후 로그"""
+    print(f"✅ 데이터 업데이트: v{snapshot.version}, {len(snapshot.stocks)}개 종목", flush=True)
+    for stock in snapshot.stocks[:3]:
+        print(f"  - {stock['rank']}위: {stock['name']} ({stock.get('rate', '')})", flush=True)
+    
+    return snapshot
+
+def store_stocks(data, source='crawl'):
+    """전체 목록 저장 (/api/update와 인프로세스 스크래퍼 공용)"""
+    return _after_store(snapshot_store.publish(data, datetime.now().isoformat(), source))
+
+def store_delta(delta, source='crawl'):
+    """델타 저장 (기준 버전 불일치 시 VersionConflict)"""
+    return _after_store(snapshot_store.publish_delta(delta, datetime.now().isoformat(), source))
+
+def store_ranking(key, data):
+    """기본 외 랭킹 전체 목록 저장"""
+    store = get_ranking_store(key, create=True)
+    if store is None:
+        raise ValueError(f"잘못된 랭킹 키: {key}")
+    snapshot = store.publish(data, datetime.now().isoformat())
+    print(f"✅ [{key}] 랭킹 업데이트: v{snapshot.version}, {len(snapshot.stocks)}개 종목", flush=True)
+    return snapshot
+
+NEWS_PATCH_FIELDS = ('summary', 'bullish_url', 'bearish_url', 'sources')
+
+def store_summaries(summaries):
+    """종목별 뉴스 요약만 현재 스냅샷에 반영 (2단계 발행의 두 번째 단계)"""
+    updates = {
+        item['name']: {field: item[field] for field in NEWS_PATCH_FIELDS if field in item}
+        for item in summaries if isinstance(item, dict) and item.get('name')
+    }
+    snapshot = snapshot_store.patch(updates, datetime.now().isoformat())
+    print(f"📝 뉴스 요약 반영: v{snapshot.version}, {len(updates)}개 종목", flush=True)
+    return snapshot
 
 @app.route('/')
 def home():
@@ -29,38 +153,353 @@ def home():
         <h1>📊 Stock Monitor API</h1>
         <p>Endpoints:</p>
         <ul>
-            <li>GET /api/stocks - 현재 주식 데이터</li>
+            <li>GET /api/stocks?limit=20&amp;offset=0&amp;fields=rank,name,rate - 현재 주식 데이터</li>
+            <li>GET /api/rankings - 랭킹 목록, GET /api/rankings/&lt;key&gt; - 랭킹별 주식 데이터</li>
+            <li>GET /api/stream - 실시간 업데이트 (SSE)</li>
+            <li>GET /api/history/&lt;종목명&gt;?minutes=60 - 종목 이력</li>
+            <li>GET /api/movers?minutes=30&amp;limit=10 - 급변 종목</li>
+            <li>GET /api/news/&lt;종목명&gt; - 종목별 뉴스 요약 (캐시에 없으면 바로 요약)</li>
+            <li>GET /api/metrics - 단계별 메트릭 (Prometheus)</li>
             <li>POST /api/update - 데이터 업데이트</li>
+            <li>POST /api/update/news - 종목별 뉴스 요약 반영</li>
+            <li>POST /api/update/rankings/&lt;key&gt; - 랭킹별 데이터 업데이트</li>
             <li>GET /api/status - 서버 상태</li>
         </ul>
         """
 
 @app.route('/api/stocks', methods=['GET'])
 def get_stocks():
-    """현재 저장된 주식 데이터 반환"""
+    """현재 저장된 주식 데이터 반환 (미리 직렬화된 본문, ETag/압축)
+    
+    ?since=<version>: 해당 버전 이후 추가/삭제/변경된 항목만 반환
+    (보관 범위를 벗어난 버전이면 전체 응답)
+    ?limit=&offset=: 순위 구간만 반환, ?fields=name,rate: 지정한 필드만 반환
+    """
+    return _stocks_response(snapshot_store)
+
+@app.route('/api/rankings', methods=['GET'])
+def list_rankings():
+    """수집 중인 랭킹 목록과 각 스냅샷 버전"""
+    rankings = []
+    for key in TOSS_RANKINGS:
+        store = get_ranking_store(key)
+        if store is not None:
+            store.sync()
+        snapshot = store.current if store is not None else None
+        rankings.append({
+            'key': key,
+            'version': snapshot.version if snapshot else 0,
+            'stocks_count': len(snapshot.stocks) if snapshot else 0,
+            'last_update': snapshot.last_update if snapshot else None
+        })
+    
+    return jsonify({
+        'primary': PRIMARY_RANKING,
+        'rankings': rankings
+    })
+
+@app.route('/api/rankings/<key>', methods=['GET'])
+def get_ranking(key):
+    """랭킹별 주식 데이터 (/api/stocks와 같은 쿼리/캐시 규칙)"""
+    store = get_ranking_store(key)
+    if store is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'랭킹을 찾을 수 없습니다: {key}'
+        }), 404
+    return _stocks_response(store)
+
+def _stocks_response(store):
+    store.sync()  # 다른 워커가 발행한 최신 버전 반영
+    
+    since = request.args.get('since', type=int)
+    if since is not None:
+        body = store.delta_body(since)
+        if body is not None:
+            response = Response(body, mimetype='application/json')
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+    
+    snapshot = store.current
+    
+    # 페이지/필드 선택 (조합별 본문도 스냅샷당 한 번만 직렬화)
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', 0, type=int)
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    if (limit is not None and not 0 < limit <= MAX_PAGE_LIMIT) or offset < 0:
+        return jsonify({
+            'status': 'error',
+            'message': f'limit은 1~{MAX_PAGE_LIMIT}, offset은 0 이상이어야 합니다'
+        }), 400
+    if limit is not None or offset or fields:
+        snapshot = snapshot.page(offset, limit, fields)
+    
+    if snapshot.matches(request.if_none_match):
+        response = Response(status=304)
+        response.headers['ETag'] = snapshot.etag
+    else:
+        body, encoding, etag = snapshot.representation(request.accept_encodings)
+        response = Response(body, mimetype='application/json')
+        response.headers['ETag'] = etag
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+_sse_slots = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+@app.route('/api/stream', methods=['GET'])
+def stream_stocks():
+    """Server-Sent Events: 새 스냅샷이 저장될 때만 클라이언트로 푸시
+    
+    동시 연결이 SSE_MAX_STREAMS를 넘으면 503 (클라이언트는 /api/stocks 폴링으로 대체)
+    """
+    if not _sse_slots.acquire(blocking=False):
+        response = jsonify({
+            'status': 'busy',
+            'message': f'실시간 연결 한도({SSE_MAX_STREAMS}) 초과 - /api/stocks 폴링을 사용하세요'
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = '60'
+        return response
+    
+    def events():
+        yield "retry: 5000\n\n"
+        sent = None
+        
+        while True:
+            with snapshot_store.changed:
+                snapshot_store.changed.wait_for(lambda: snapshot_store.current is not sent, timeout=SSE_HEARTBEAT)
+                snapshot = snapshot_store.current
+            
+            if snapshot is sent:
+                # 프록시 유휴 연결 종료 방지용 하트비트
+                yield ": ping\n\n"
+                continue
+            
+            sent = snapshot
+            event_id = snapshot.etag.strip('"')
+            yield f"event: stocks\nid: {event_id}\ndata: {snapshot.body.decode('utf-8')}\n\n"
+    
+    response = Response(events(), mimetype='text/event-stream')
+    response.call_on_close(_sse_slots.release)  # 연결 종료 시 (제너레이터 시작 전 끊겨도) 반납
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def _window_since(default_minutes):
+    """?minutes= 쿼리 → 조회 시작 시각(epoch)"""
+    minutes = request.args.get('minutes', default_minutes, type=float)
+    return time.time() - max(0.0, minutes) * 60
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts).isoformat()
+
+@app.route('/api/history/<path:name>', methods=['GET'])
+def stock_history(name):
+    """종목 하나의 순위/가격/등락률 이력"""
+    points = ranking_history.series(name, _window_since(60))
+    for point in points:
+        point['ts'] = _iso(point['ts'])
+    
+    return jsonify({
+        'name': name,
+        'points': points,
+        'count': len(points)
+    })
+
+@app.route('/api/movers', methods=['GET'])
+def top_movers():
+    """최근 N분 동안 가격 변화가 큰 종목"""
+    limit = request.args.get('limit', 10, type=int)
+    movers = ranking_history.movers(_window_since(30), max(1, limit))
+    for mover in movers:
+        mover['from']['ts'] = _iso(mover['from']['ts'])
+        mover['to']['ts'] = _iso(mover['to']['ts'])
+    
+    return jsonify({
+        'movers': movers,
+        'count': len(movers)
+    })
+
+def _news_module():
+    """scraper 모듈 - 인프로세스 스크래퍼와 같은 NewsCache(메모리 LRU + SQLite)를 공유
+    
+    스크래퍼를 돌리지 않는 워커는 첫 요청 때 임포트 (요약은 같은 SQLite 파일로 공유)
+    """
+    import scraper
+    return scraper
+
+def _is_known_stock(name):
+    """현재 어느 랭킹에든 있거나 이력에 기록된 종목"""
+    if name in ranking_history:
+        return True
+    with _ranking_stores_lock:
+        stores = list(ranking_stores.values())
+    return any(s.get('name') == name for store in stores for s in store.current.stocks)
+
+@app.route('/api/news/<path:name>', methods=['GET'])
+def get_news(name):
+    """종목 하나의 뉴스 요약 (현재 순위에 없는 종목도 조회 가능)
+    
+    캐시에 없으면 그 자리에서 RSS 수집 + 요약, 같은 종목 동시 요청은 한 번의 수집/요약을 공유
+    새 요약은 현재/과거 랭킹이나 뉴스 캐시에 있는 종목만 (그 외는 404)
+    """
+    name = name.strip()
+    if not name or len(name) > NEWS_NAME_MAX_LEN:
+        return jsonify({
+            'status': 'error',
+            'message': f'종목명은 1~{NEWS_NAME_MAX_LEN}자여야 합니다'
+        }), 400
+    
+    snapshot_store.sync()
+    ranked = next((s for s in snapshot_store.current.stocks if s.get('name') == name), None)
+    
+    try:
+        result, source = _news_module().lookup_news(
+            name, ranked.get('rate', '') if ranked else '',
+            known=ranked is not None or _is_known_stock(name)
+        )
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'뉴스 요약 실패: {e}'
+        }), 503
+    
+    if result is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'순위/이력에 없는 종목입니다: {name}'
+        }), 404
+    
     return jsonify({
-        'stocks': stocks_data,
-        'last_update': last_update,
-        'count': len(stocks_data)
+        'name': name,
+        'rank': ranked.get('rank') if ranked else None,
+        **{field: result.get(field) for field in NEWS_PATCH_FIELDS},
+        'summarizer': result.get('summarizer'),
+        'source': source
     })
 
+def _validate_stocks(data):
+    """발행 전 목록 검사 - 스냅샷은 교체 후 되돌릴 수 없으므로 잘못된 본문은 여기서 거부"""
+    if not isinstance(data, list):
+        raise ValueError("종목 목록(list)이 필요합니다")
+    for stock in data:
+        if not isinstance(stock, dict) or not isinstance(stock.get('name'), str) or not stock['name']:
+            raise ValueError("각 종목은 name(문자열)이 있는 객체여야 합니다")
+        if not isinstance(stock.get('rank'), int) or isinstance(stock['rank'], bool):
+            raise ValueError(f"종목 rank(정수)가 필요합니다: {stock['name']}")
+
+def _validate_delta(delta):
+    """델타 본문 검사 (added/changed는 종목 목록, removed는 종목명 목록)"""
+    if not isinstance(delta.get('base_version'), int):
+        raise ValueError("base_version(정수)이 필요합니다")
+    _validate_stocks(delta.get('added', []))
+    _validate_stocks(delta.get('changed', []))
+    removed = delta.get('removed', [])
+    if not isinstance(removed, list) or not all(isinstance(name, str) for name in removed):
+        raise ValueError("removed는 종목명 목록이어야 합니다")
+
+def _validate_summaries(summaries):
+    """요약 패치 검사 (name/summary/URL은 문자열, sources는 목록) - 패치 발행 전에 거부"""
+    if not isinstance(summaries, list):
+        raise ValueError("summaries 목록(list)이 필요합니다")
+    for item in summaries:
+        if not isinstance(item, dict) or not isinstance(item.get('name'), str) or not item['name']:
+            raise ValueError("각 요약은 name(문자열)이 있는 객체여야 합니다")
+        if not isinstance(item.get('summary'), str):
+            raise ValueError(f"summary(문자열)가 필요합니다: {item['name']}")
+        for field in ('bullish_url', 'bearish_url'):
+            if not isinstance(item.get(field, ''), str):
+                raise ValueError(f"{field}는 문자열이어야 합니다: {item['name']}")
+        if not isinstance(item.get('sources', []), list):
+            raise ValueError(f"sources는 목록이어야 합니다: {item['name']}")
+
 @app.route('/api/update', methods=['POST'])
 def update_stocks():
-    """스크래퍼에서 보낸 데이터 저장"""
-    global stocks_data, last_update
+    """스크래퍼에서 보낸 데이터 저장
     
+    - 목록: 전체 교체
+    - {"base_version", "added", "removed", "changed"}: 델타 적용 (기준 버전이 다르면 409)
+    - ?source=test_data: 크롤링 실패 시의 테스트 데이터 (이력에 기록하지 않음)
+    """
     try:
-        stocks_data = request.json
-        last_update = datetime.now().isoformat()
+        source = request.args.get('source', 'crawl')
+        if source not in ('crawl', 'test_data'):
+            raise ValueError(f"알 수 없는 source: {source}")
+        data = request.json
+        if isinstance(data, dict):
+            _validate_delta(data)
+            snapshot = store_delta(data, source)
+        else:
+            _validate_stocks(data)
+            snapshot = store_stocks(data, source)
         
-        print(f"✅ 데이터 업데이트: {len(stocks_data)}개 종목", flush=True)
-        for stock in stocks_data[:3]:
-            print(f"  - {stock['rank']}위: {stock['name']} ({stock['rate']})", flush=True)
+        return jsonify({
+            'status': 'success',
+            'message': f'{len(snapshot.stocks)}개 종목 업데이트 완료',
+            'timestamp': snapshot.last_update,
+            'version': snapshot.version
+        })
+    except VersionConflict as e:
+        return jsonify({
+            'status': 'conflict',
+            'message': str(e),
+            'version': e.current_version
+        }), 409
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+@app.route('/api/update/news', methods=['POST'])
+def update_news():
+    """종목별 뉴스 요약 반영 (가격 목록은 /api/update로 먼저 발행됨)
+    
+    {"summaries": [{"name", "summary", "bullish_url", "bearish_url", "sources"}, ...]}
+    현재 목록에 없는 종목은 무시
+    """
+    try:
+        body = request.json
+        if not isinstance(body, dict):
+            raise ValueError('{"summaries": [...]} 형식이어야 합니다')
+        summaries = body.get('summaries', [])
+        _validate_summaries(summaries)
+        snapshot = store_summaries(summaries)
+        
+        return jsonify({
+            'status': 'success',
+            'message': f'{len(summaries)}개 종목 요약 반영',
+            'timestamp': snapshot.last_update,
+            'version': snapshot.version
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+@app.route('/api/update/rankings/<key>', methods=['POST'])
+def update_ranking(key):
+    """기본 외 랭킹 전체 목록 저장 (기본 랭킹은 /api/update)"""
+    try:
+        data = request.json
+        _validate_stocks(data)
+        if key not in TOSS_RANKINGS:
+            return jsonify({
+                'status': 'error',
+                'message': f'설정되지 않은 랭킹입니다: {key}'
+            }), 404
+        snapshot = store_stocks(data) if key == PRIMARY_RANKING else store_ranking(key, data)
         
         return jsonify({
             'status': 'success',
-            'message': f'{len(stocks_data)}개 종목 업데이트 완료',
-            'timestamp': last_update
+            'message': f'[{key}] {len(snapshot.stocks)}개 종목 업데이트 완료',
+            'timestamp': snapshot.last_update,
+            'version': snapshot.version
         })
     except Exception as e:
         return jsonify({
@@ -68,99 +507,251 @@ def update_stocks():
             'message': str(e)
         }), 400
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """파이프라인 단계별 메트릭 (Prometheus 텍스트 형식)"""
+    body = None
+    if METRICS_FILE and not scraper_leader.is_set():
+        body = metrics.read_file(METRICS_FILE)  # 스크래퍼는 다른 워커에서 실행 중
+    if body is None:
+        body = metrics.registry.render()
+    return Response(body, content_type=metrics.CONTENT_TYPE)
+
 @app.route('/api/status', methods=['GET'])
 def status():
     """서버 상태 확인"""
+    snapshot_store.sync()
+    snapshot = snapshot_store.current
     return jsonify({
         'status': 'running',
-        'stocks_count': len(stocks_data),
-        'last_update': last_update,
+        'stocks_count': len(snapshot.stocks),
+        'version': snapshot.version,
+        'history_rows': len(ranking_history),
+        'market_phase': market_phase()[0],
+        'rankings': TOSS_RANKINGS,
+        'last_update': snapshot.last_update,
         'server_time': datetime.now().isoformat()
     })
 
+class InProcessScraper:
+    """scraper.py를 한 번만 임포트해 같은 프로세스에서 사이클 실행
+    
+    - 뉴스 캐시/드라이버 풀/HTTP 풀이 사이클 간 메모리에 유지됨
+    - 결과는 루프백 HTTP 없이 store_stocks()로 바로 반영
+    - 사이클은 전용 스레드에서 실행, 타임아웃 시 드라이버를 강제 종료하고 결과 폐기
+    """
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.module = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scraper")
+        self._pending = None
+
+    def load(self):
+        """scraper 모듈 임포트 (최초 1회)"""
+        if self.module is None:
+            os.environ.setdefault('DOCKER_ENV', 'true')
+            import scraper
+            self.module = scraper
+            print("✅ scraper 모듈 로드 완료", flush=True)
+            
+            # 첫 사이클이 Chrome 시작 비용을 치르지 않도록 풀을 미리 채움
+            try:
+                scraper.driver_pool.warm()
+            except Exception as e:
+                print(f"⚠️ 드라이버 예열 실패 (첫 사이클에서 다시 생성): {e}", flush=True)
+        return self.module
+
+    def _cycle(self, abandoned):
+        scraper = self.module
+        
+        # 타임아웃으로 버려진 사이클의 결과는 반영하지 않음
+        def publish_prices(stocks, source="crawl"):
+            if not abandoned.is_set():
+                store_stocks(stocks, source)
+                metrics.publish_total.inc(mode="inprocess", result="ok")
+        
+        def publish_summaries(items):
+            if not abandoned.is_set():
+                store_summaries(items)
+                metrics.publish_total.inc(mode="inprocess_news", result="ok")
+        
+        def publish_ranking(key, stocks):
+            if not abandoned.is_set():
+                store_ranking(key, stocks)
+                metrics.publish_total.inc(mode="inprocess_ranking", result="ok")
+        
+        data, result = scraper.run_cycle(publish_prices, publish_summaries, publish_ranking)
+        
+        # 중간 발행으로 이미 같은 목록이면 새 버전을 만들지 않음
+        if data and not abandoned.is_set():
+            if data != snapshot_store.current.stocks:
+                with metrics.stage_seconds.time(stage="publish"):
+                    store_stocks(data, result)
+                metrics.publish_total.inc(mode="inprocess", result="ok")
+            scraper.print_top_stocks(data)
+        return data, result
+
+    def run_once(self):
+        """사이클 1회 실행, 성공 여부 반환"""
+        # 이전(타임아웃된) 사이클이 아직 돌고 있으면 겹치지 않게 대기
+        if self._pending is not None and not self._pending.done():
+            print("⏳ 이전 사이클 종료 대기...", flush=True)
+            try:
+                self._pending.result(timeout=self.timeout)
+            except BaseException:
+                pass
+            if not self._pending.done():
+                print("⚠️ 이전 사이클이 아직 실행 중 - 이번 회차 건너뜀", flush=True)
+                return False
+        
+        abandoned = threading.Event()
+        self._pending = self._executor.submit(self._cycle, abandoned)
+        
+        try:
+            data, result = self._pending.result(timeout=self.timeout)
+            if result != "crawl":
+                # 테스트 데이터로 대체된 사이클은 실패로 기록 (스케줄러 백오프)
+                print("⚠️ 크롤링 실패 - 테스트 데이터 사이클은 실패로 처리", flush=True)
+                return False
+            return bool(data)
+        except FutureTimeout:
+            abandoned.set()
+            print(f"⏱️ 스크래퍼 타임아웃 ({self.timeout}초 초과)", flush=True)
+            # 블로킹된 셀레니움 호출을 풀기 위해 드라이버 강제 종료
+            self.module.driver_pool.terminate()
+        except (Exception, SystemExit) as e:
+            print(f"❌ 스크래퍼 사이클 오류: {e}", flush=True)
+            import traceback
+            traceback.print_exc()
+        
+        return False
+
+def run_scraper_subprocess():
+    """scraper.py를 별도 프로세스로 1회 실행 (SCRAPER_MODE=subprocess)"""
+    try:
+        env = os.environ.copy()
+        env['API_URL'] = 'http://localhost:8080/api/update'
+        env['DOCKER_ENV'] = 'true'
+        env['PYTHONUNBUFFERED'] = '1'
+        
+        # 스크래퍼 실행
+        print("🚀 scraper.py 프로세스 시작...", flush=True)
+        
+        result = subprocess.run(
+            [sys.executable, '-u', 'scraper.py', 'auto'],
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=SCRAPER_TIMEOUT
+        )
+        
+        # 출력 표시
+        if result.stdout:
+            print("\n📝 스크래퍼 출력:", flush=True)
+            print("-" * 60, flush=True)
+            for line in result.stdout.split('\n'):
+                if line.strip():
+                    print(f"  > {line}", flush=True)
+            print("-" * 60, flush=True)
+        
+        if result.stderr:
+            print("\n❌ 스크래퍼 에러:", flush=True)
+            print("-" * 60, flush=True)
+            for line in result.stderr.split('\n'):
+                if line.strip():
+                    print(f"  ERROR> {line}", flush=True)
+            print("-" * 60, flush=True)
+        
+        print(f"\n종료 코드: {result.returncode}", flush=True)
+        
+        if result.returncode == 0:
+            print("✅ 스크래퍼 정상 종료", flush=True)
+            return True
+        else:
+            print("⚠️ 스크래퍼 비정상 종료", flush=True)
+            
+    except subprocess.TimeoutExpired:
+        print(f"⏱️ 스크래퍼 타임아웃 ({SCRAPER_TIMEOUT}초 초과)", flush=True)
+    except FileNotFoundError as e:
+        print(f"❌ scraper.py 파일을 찾을 수 없음: {e}", flush=True)
+    except Exception as e:
+        print(f"❌ 스크래퍼 실행 오류: {e}", flush=True)
+        import traceback
+        traceback.print_exc()
+    
+    return False
+
 def run_scraper_loop():
     """백그라운드에서 스크래퍼를 주기적으로 실행"""
-    time.sleep(30)  # Flask 서버 시작 대기
+    run_once = run_scraper_subprocess
+    
+    if SCRAPER_MODE == 'inprocess':
+        worker = InProcessScraper(SCRAPER_TIMEOUT)
+        try:
+            worker.load()
+            run_once = worker.run_once
+        except Exception as e:
+            print(f"⚠️ scraper 모듈 로드 실패, 서브프로세스 모드로 전환: {e}", flush=True)
+    
+    if run_once is run_scraper_subprocess:
+        time.sleep(30)  # Flask 서버 시작 대기 (루프백 HTTP 전송용)
+    
     print("=" * 60, flush=True)
-    print("🔄 스크래퍼 백그라운드 루프 시작", flush=True)
+    print(f"🔄 스크래퍼 백그라운드 루프 시작 ({'인프로세스' if run_once is not run_scraper_subprocess else '서브프로세스'})", flush=True)
     print("=" * 60, flush=True)
     
+    scheduler = MarketScheduler(SCRAPER_INTERVAL)
     cycle = 0
     
     while True:
-        cycle += 1
+        phase, interval = scheduler.phase()
         
-        try:
+        # 휴장 중에는 크롤링 생략 (최초 1회는 직전 장 마감 순위 확보용으로 실행)
+        if interval is not None or snapshot_store.current.version == 0:
+            cycle += 1
+            
             print(f"\n{'='*60}", flush=True)
-            print(f"📊 스크래퍼 실행 [{cycle}회차] - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", flush=True)
+            print(f"📊 스크래퍼 실행 [{cycle}회차] - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ({phase})", flush=True)
             print("=" * 60, flush=True)
             
-            env = os.environ.copy()
-            env['API_URL'] = 'http://localhost:8080/api/update'
-            env['DOCKER_ENV'] = 'true'
-            env['PYTHONUNBUFFERED'] = '1'
-            
-            # 스크래퍼 실행
-            print("🚀 scraper.py 프로세스 시작...", flush=True)
-            
-            result = subprocess.run(
-                [sys.executable, '-u', 'scraper.py', 'auto'],
-                env=env,
-                capture_output=True,
-                text=True,
-                timeout=120
-            )
-            
-            # 출력 표시
-            if result.stdout:
-                print("\n📝 스크래퍼 출력:", flush=True)
-                print("-" * 60, flush=True)
-                for line in result.stdout.split('\n'):
-                    if line.strip():
-                        print(f"  > {line}", flush=True)
-                print("-" * 60, flush=True)
-            
-            if result.stderr:
-                print("\n❌ 스크래퍼 에러:", flush=True)
-                print("-" * 60, flush=True)
-                for line in result.stderr.split('\n'):
-                    if line.strip():
-                        print(f"  ERROR> {line}", flush=True)
-                print("-" * 60, flush=True)
+            started = scheduler.now()
+            ok = False
+            try:
+                ok = bool(run_once())
+            except Exception as e:
+                print(f"❌ 스크래퍼 실행 오류: {e}", flush=True)
+            scheduler.record(ok)
             
-            print(f"\n종료 코드: {result.returncode}", flush=True)
-            
-            if result.returncode == 0:
-                print("✅ 스크래퍼 정상 종료", flush=True)
-            else:
-                print("⚠️ 스크래퍼 비정상 종료", flush=True)
-                
-        except subprocess.TimeoutExpired:
-            print("⏱️ 스크래퍼 타임아웃 (120초 초과)", flush=True)
-        except FileNotFoundError as e:
-            print(f"❌ scraper.py 파일을 찾을 수 없음: {e}", flush=True)
-        except Exception as e:
-            print(f"❌ 스크래퍼 실행 오류: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
+            if METRICS_FILE:
+                try:
+                    metrics.registry.write_file(METRICS_FILE)
+                except Exception as e:
+                    print(f"⚠️ 메트릭 파일 기록 실패: {e}", flush=True)
+        else:
+            started = scheduler.now()
         
-        # 다음 실행까지 대기
-        wait_time = 15
-        print(f"\n⏳ {wait_time}초 후 재실행...", flush=True)
+        # 다음 실행까지 대기 (장 구간별 주기, 실패 시 백오프)
+        wait_time, phase = scheduler.next_delay(started)
+        if scheduler.failures:
+            print(f"\n⚠️ 연속 실패 {scheduler.failures}회 - {wait_time:.0f}초 후 재시도", flush=True)
+        elif interval is None:
+            print(f"\n💤 장 휴장 ({phase}) - {wait_time:.0f}초 대기 (다음 장전: {scheduler.next_session_start():%Y-%m-%d %H:%M})", flush=True)
+        else:
+            print(f"\n⏳ {wait_time:.0f}초 후 재실행 ({phase})...", flush=True)
         print("=" * 15, flush=True)
-        
-        # 대기 중에도 상태 표시
-        for i in range(wait_time, 0, -10):
-            time.sleep(min(10, i))
-            if i > 10:
-                print(f"  ... {i-10}초 남음", flush=True)
+        time.sleep(wait_time)
 
-if __name__ == '__main__':
-    port = int(os.environ.get('PORT', 8080))
-    
-    # 버퍼링 비활성화
-    sys.stdout = os.fdopen(sys.stdout.fileno(), 'w', 1)
-    sys.stderr = os.fdopen(sys.stderr.fileno(), 'w', 1)
+def run_scraper_as_leader():
+    """스크래퍼 락을 잡은 워커 하나만 루프 실행 (그 워커가 죽으면 다른 워커가 인계)"""
+    lock_fd = os.open(SCRAPER_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(lock_fd, fcntl.LOCK_EX)  # 프로세스가 살아 있는 동안 보유
+    scraper_leader.set()
+    print(f"🎯 스크래퍼 담당 워커: pid {os.getpid()}", flush=True)
+    run_scraper_loop()
+
+def start_background_tasks():
+    """워커 프로세스마다 호출: 스냅샷 동기화 + (프로덕션) 스크래퍼 담당 선출"""
+    snapshot_store.start_sync(SNAPSHOT_SYNC_INTERVAL)
     
     # 프로덕션 환경에서만 스크래퍼 실행
     if os.environ.get('PORT'):  # DigitalOcean은 PORT 환경변수를 설정함
@@ -169,11 +760,20 @@ if __name__ == '__main__':
         print("=" * 60, flush=True)
         
         # 스크래퍼 백그라운드 스레드 시작
-        scraper_thread = threading.Thread(target=run_scraper_loop, daemon=True)
+        scraper_thread = threading.Thread(target=run_scraper_as_leader, daemon=True)
         scraper_thread.start()
         print("✅ 스크래퍼 스레드 시작됨", flush=True)
     else:
         print("💻 로컬 환경 - 스크래퍼 수동 실행 필요", flush=True)
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 8080))
+    
+    # 버퍼링 비활성화
+    sys.stdout = os.fdopen(sys.stdout.fileno(), 'w', 1)
+    sys.stderr = os.fdopen(sys.stderr.fileno(), 'w', 1)
+    
+    start_background_tasks()
     
     print(f"🚀 Flask 서버 시작: http://0.0.0.0:{port}", flush=True)
     app.run(debug=False, host='0.0.0.0', port=port)
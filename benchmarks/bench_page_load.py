@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+토스 랭킹 페이지 로드 벤치마크 (실제 Chrome + 네트워크 필요)
+- 프로파일
+  full  : 차단 없음, pageLoadStrategy normal (변경 전 로드 방식)
+  light : 이미지/폰트/미디어/분석 스크립트 차단 + TOSS_PAGE_LOAD_STRATEGY (기본 eager)
+- 회차마다 about:blank → 페이지 이동 → wait_for_ranking_ready() 완료까지 시간,
+  로드 중 chromedriver + 크롬 프로세스 트리 최대 RSS(MB), 리소스 요청 수/전송량 측정
+- 프로파일마다 드라이버를 새로 띄우고 첫 회차는 워밍업으로 제외
+
+사용법: python benchmarks/bench_page_load.py [--iterations 5] [--ranking heavy_soar] [--profiles full,light] [--save out.json]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 벤치마크가 작업 디렉터리의 캐시 DB를 건드리지 않도록
+os.environ.setdefault("NEWS_CACHE_DB", os.path.join(tempfile.gettempdir(), "bench_news_cache.db"))
+
+import scraper  # noqa: E402
+
+PROFILES = {"full": False, "light": True}
+
+RESOURCE_SCRIPT = """
+const entries = performance.getEntriesByType('resource');
+return [entries.length, entries.reduce((sum, e) => sum + (e.transferSize || 0), 0)];
+"""
+
+
+class RssSampler:
+    """백그라운드에서 프로세스 트리 RSS를 주기적으로 읽어 최댓값 기록"""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, scraper._process_tree_rss_mb(self.pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, scraper._process_tree_rss_mb(self.pid))
+
+
+def measure_profile(light_load: bool, url: str, iterations: int) -> dict:
+    """프로파일 하나: 드라이버 생성 → (워밍업 1회 + iterations회) 로드"""
+    with redirect_stdout(io.StringIO()):
+        driver = scraper.setup_driver(light_load=light_load)
+
+    samples = []
+    try:
+        pid = driver.service.process.pid
+        for i in range(iterations + 1):
+            driver.get("about:blank")
+            with RssSampler(pid) as sampler:
+                start = time.perf_counter()
+                driver.get(url)
+                page_load = time.perf_counter() - start
+                with redirect_stdout(io.StringIO()):
+                    scraper.wait_for_ranking_ready(driver)
+                ready = time.perf_counter() - start
+            requests_count, transfer = driver.execute_script(RESOURCE_SCRIPT)
+            rows = driver.execute_script(
+                f"return document.querySelectorAll('{scraper.RANKING_ROW_SELECTOR}').length;")
+
+            if i == 0:
+                continue  # 워밍업 (DNS/TLS/디스크 캐시)
+            samples.append({
+                "page_load_ms": page_load * 1000,
+                "ready_ms": ready * 1000,
+                "peak_rss_mb": sampler.peak,
+                "requests": requests_count,
+                "transfer_kb": transfer / 1024,
+                "rows": rows,
+            })
+    finally:
+        driver.quit()
+
+    def stat(key, func=statistics.median):
+        return round(func(s[key] for s in samples), 2)
+
+    ready = sorted(s["ready_ms"] for s in samples)
+    return {
+        "iterations": len(samples),
+        "page_load_p50_ms": stat("page_load_ms"),
+        "ready_p50_ms": stat("ready_ms"),
+        "ready_p95_ms": round(ready[min(len(ready) - 1, round(0.95 * (len(ready) - 1)))], 2),
+        "peak_rss_mb": stat("peak_rss_mb", max),
+        "requests": stat("requests"),
+        "transfer_kb": stat("transfer_kb"),
+        "rows": min(s["rows"] for s in samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="토스 페이지 로드 벤치마크 (요청 차단 전후)")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--ranking", default=scraper.TOSS_RANKINGS[0])
+    parser.add_argument("--profiles", default="full,light", help="쉼표 구분 (full, light)")
+    parser.add_argument("--save", help="결과를 JSON으로 저장")
+    args = parser.parse_args()
+
+    url = scraper.TOSS_LIVE_CHART_URL.format(args.ranking)
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip() in PROFILES]
+    print(f"URL: {url} | 반복 {args.iterations}회 (+워밍업 1회) | 경량 로드 전략: {scraper.TOSS_PAGE_LOAD_STRATEGY}")
+
+    results = {}
+    for name in profiles:
+        results[name] = r = measure_profile(PROFILES[name], url, args.iterations)
+        print(f"{name:<6} get() {r['page_load_p50_ms']:8.0f}ms | 준비 p50 {r['ready_p50_ms']:8.0f}ms"
+              f" / p95 {r['ready_p95_ms']:8.0f}ms | 최대 RSS {r['peak_rss_mb']:7.1f}MB"
+              f" | 요청 {r['requests']:5.0f}개 {r['transfer_kb']:8.1f}KB | 행 {r['rows']}개")
+
+    if "full" in results and "light" in results:
+        full, light = results["full"], results["light"]
+        print("\nlight / full")
+        for key, label in (("ready_p50_ms", "준비 p50"), ("peak_rss_mb", "최대 RSS"), ("transfer_kb", "전송량")):
+            if full[key]:
+                print(f"  {label:<8} {full[key]:9.1f} → {light[key]:9.1f} ({(light[key] / full[key] - 1) * 100:+6.1f}%)")
+        if light["rows"] < full["rows"]:
+            print(f"  ⚠️ 경량 로드에서 행 수 감소 ({full['rows']} → {light['rows']}) - 차단 패턴 확인 필요")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "config": {"url": url, "iterations": args.iterations,
+                           "page_load_strategy": scraper.TOSS_PAGE_LOAD_STRATEGY,
+                           "blocked_urls": scraper.DEFAULT_BLOCKED_URLS + scraper.TOSS_BLOCKED_URLS},
+                "results": results
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 결과 저장: {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+토스 랭킹 HTML 파싱 벤치마크
+- 기존 경로: html.parser로 전체 문서 파싱 + 행마다 셀렉터 4개/ span 2회 스캔
+- 빠른 경로: make_toss_soup() (lxml + 테이블만 파싱) + parse_toss_rows()
+- 두 경로의 결과가 동일한지 먼저 확인한 뒤 페이지당 파싱 시간 출력
+
+사용법: python benchmarks/bench_parse.py [반복횟수]
+"""
+
+import io
+import os
+import sys
+import time
+import tempfile
+import statistics
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+sys.path.insert(0, ROOT)
+
+# 벤치마크가 작업 디렉터리의 캐시 DB를 건드리지 않도록
+os.environ.setdefault("NEWS_CACHE_DB", os.path.join(tempfile.gettempdir(), "bench_news_cache.db"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+import scraper  # noqa: E402
+
+PAGES = ["toss_heavy_soar.html", "toss_fallback_layout.html"]
+
+
+def legacy_parse_rows(soup, limit=10):
+    """변경 전 parse_toss_stocks()의 행 추출 로직 (비교 기준)"""
+    rows_data = []
+    rows = soup.select('tr[data-tossinvest-log="RankingListRow"]')
+    if not rows:
+        rows = soup.select('tbody tr')
+
+    for i, row in enumerate(rows[:limit], 1):
+        name = ""
+        for selector in scraper.TOSS_NAME_SELECTORS:
+            elem = row.select_one(selector)
+            if elem:
+                text = elem.get_text(strip=True)
+                if text and not text.isdigit() and not all(c in ',.%+-' for c in text):
+                    name = text
+                    break
+        if not name:
+            for span in row.select('span'):
+                text = span.get_text(strip=True)
+                if text and not any(x in text for x in ['%', '원', ',']) and len(text) > 1:
+                    name = text
+                    break
+
+        price = "0원"
+        rate = "+0.0%"
+        for span in row.select('span'):
+            text = span.get_text(strip=True)
+            if '원' in text and price == "0원":
+                price = text
+            elif '%' in text and rate == "+0.0%":
+                rate = text
+
+        if not name or len(name) < 2:
+            name = f"종목{i}"
+        if rate and not rate.startswith(('+', '-')):
+            rate = '+' + rate
+
+        rows_data.append({"rank": i, "name": name, "price": price, "rate": rate})
+    return rows_data
+
+
+def legacy_path(html, limit):
+    return legacy_parse_rows(BeautifulSoup(html, 'html.parser'), limit)
+
+
+def fast_path(html, limit):
+    return scraper.parse_toss_rows(scraper.make_toss_soup(html), limit)
+
+
+def measure(func, html, limit, repeat):
+    """반복 실행 시간(ms) 목록"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            func(html, limit)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"파서 백엔드: {scraper.HTML_PARSER}")
+
+    for page in PAGES:
+        with open(os.path.join(FIXTURES, page), 'r', encoding='utf-8') as f:
+            html = f.read()
+
+        for limit in (10, 100):
+            with redirect_stdout(io.StringIO()):
+                expected = legacy_path(html, limit)
+                actual = fast_path(html, limit)
+            if expected != actual:
+                print(f"❌ {page} (상위 {limit}): 결과 불일치")
+                sys.exit(1)
+
+            legacy = measure(legacy_path, html, limit, repeat)
+            fast = measure(fast_path, html, limit, repeat)
+            print(
+                f"{page:<28} 상위 {limit:>3} | 행 {len(actual):>3} | "
+                f"기존 {statistics.median(legacy):7.2f}ms | "
+                f"빠른 경로 {statistics.median(fast):7.2f}ms | "
+                f"{statistics.median(legacy) / statistics.median(fast):4.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+스크래핑/뉴스 요약 파이프라인 오프라인 벤치마크
+- 외부 네트워크 없이 실행: RSS/OpenAI/API 업스트림은 로컬 스텁 서버(stub_server.py)가 대신함
+- 시나리오
+  parse        : 저장된 토스 HTML → make_toss_soup() + parse_toss_rows()
+  enrich_cold  : 캐시 비운 상태에서 enrich_stocks() (RSS 병렬 + GPT 일괄 요약)
+  enrich_warm  : 캐시가 채워진 상태에서 enrich_stocks()
+  full_cycle   : HTML 파싱 → 뉴스 요약(콜드) → send_to_api() (Chrome 구동 제외)
+- 지연(p50/p95/평균)과 처리량 출력, --save로 기준선 저장 후 --compare로 비교
+
+사용법: python benchmarks/bench_pipeline.py [--iterations 10] [--save base.json] [--compare base.json]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from stub_server import StubServer  # noqa: E402
+
+PAGES = ["toss_heavy_soar.html", "toss_fallback_layout.html"]
+
+
+def configure_env(stub_url: str):
+    """scraper 임포트 전에 업스트림을 스텁 서버로 돌림"""
+    os.environ["GOOGLE_NEWS_RSS_URL"] = f"{stub_url}/rss/search"
+    os.environ["OPENAI_BASE_URL"] = f"{stub_url}/v1"
+    os.environ["OPENAI_API_KEY"] = "sk-offline-benchmark"
+    os.environ["API_URL"] = f"{stub_url}/api/update"
+    os.environ["NEWS_CACHE_DB"] = os.path.join(tempfile.mkdtemp(prefix="bench_"), "news_cache.db")
+
+
+def reset_news_cache(scraper):
+    """메모리/SQLite 캐시와 RSS 검증자(ETag) 모두 비우기 (콜드 시나리오용 - 304 재사용 방지)"""
+    cache = scraper.news_cache
+    with cache._lock:
+        cache.cache.clear()
+        if cache._db is not None:
+            with cache._db:
+                cache._db.execute("DELETE FROM news_cache")
+    with scraper._rss_validators_lock:
+        scraper._rss_validators.clear()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_scenario(func, iterations, units):
+    """func() 반복 실행 → 지연(ms) 통계 + 초당 처리 단위 수"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    total_seconds = sum(samples) / 1000
+    return {
+        "iterations": iterations,
+        "p50_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(percentile(samples, 95), 2),
+        "mean_ms": round(statistics.mean(samples), 2),
+        "throughput": round(units * iterations / total_seconds, 2) if total_seconds else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="파이프라인 오프라인 벤치마크")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--rss-latency-ms", type=float, default=80)
+    parser.add_argument("--gpt-latency-ms", type=float, default=600)
+    parser.add_argument("--gpt-item-latency-ms", type=float, default=40)
+    parser.add_argument("--save", help="결과를 JSON 기준선으로 저장")
+    parser.add_argument("--compare", help="저장된 기준선과 비교")
+    args = parser.parse_args()
+
+    stub = StubServer(
+        rss_latency_ms=args.rss_latency_ms,
+        gpt_latency_ms=args.gpt_latency_ms,
+        gpt_item_latency_ms=args.gpt_item_latency_ms
+    ).start()
+    configure_env(stub.url)
+
+    with redirect_stdout(io.StringIO()):
+        import scraper
+
+    pages = []
+    for page in PAGES:
+        with open(os.path.join(FIXTURES, page), "r", encoding="utf-8") as f:
+            pages.append(f.read())
+
+    with redirect_stdout(io.StringIO()):
+        rows = scraper.parse_toss_rows(scraper.make_toss_soup(pages[0]))
+
+    def parse():
+        for html in pages:
+            scraper.parse_toss_rows(scraper.make_toss_soup(html))
+
+    def enrich_cold():
+        reset_news_cache(scraper)
+        scraper.enrich_stocks(rows)
+
+    def enrich_warm():
+        scraper.enrich_stocks(rows)
+
+    def full_cycle():
+        reset_news_cache(scraper)
+        # 직전 회차 전송 기록이 남으면 델타가 비어 전송이 생략됨 → 매 회차 전체 전송 측정
+        scraper._last_sent.update(version=None, stocks=None)
+        cycle_rows = scraper.parse_toss_rows(scraper.make_toss_soup(pages[0]))
+        stocks = scraper.enrich_stocks(cycle_rows)
+        if not scraper.send_to_api(stocks):
+            raise RuntimeError("스텁 API 전송 실패")
+
+    scenarios = [
+        ("parse", parse, len(pages), "페이지/s"),
+        ("enrich_cold", enrich_cold, len(rows), "종목/s"),
+        ("enrich_warm", enrich_warm, len(rows), "종목/s"),
+        ("full_cycle", full_cycle, 1, "사이클/s"),
+    ]
+
+    print(f"스텁 지연: RSS {args.rss_latency_ms:.0f}ms / GPT {args.gpt_latency_ms:.0f}ms"
+          f" (+{args.gpt_item_latency_ms:.0f}ms/종목) | 반복 {args.iterations}회 | 종목 {len(rows)}개")
+
+    results = {}
+    for name, func, units, unit_label in scenarios:
+        results[name] = run_scenario(func, args.iterations, units)
+        r = results[name]
+        print(f"{name:<12} p50 {r['p50_ms']:9.2f}ms | p95 {r['p95_ms']:9.2f}ms | "
+              f"평균 {r['mean_ms']:9.2f}ms | {r['throughput']:8.2f} {unit_label}")
+
+    print(f"스텁 요청 수: {json.dumps(stub.requests, ensure_ascii=False)}")
+    stub.stop()
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+        print(f"\n기준선 비교 ({args.compare})")
+        for name, r in results.items():
+            base = baseline.get(name)
+            if not base or not base.get("p50_ms"):
+                continue
+            change = (r["p50_ms"] / base["p50_ms"] - 1) * 100
+            print(f"{name:<12} p50 {base['p50_ms']:9.2f}ms → {r['p50_ms']:9.2f}ms ({change:+6.1f}%)")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "config": {
+                    "iterations": args.iterations,
+                    "rss_latency_ms": args.rss_latency_ms,
+                    "gpt_latency_ms": args.gpt_latency_ms,
+                    "gpt_item_latency_ms": args.gpt_item_latency_ms
+                },
+                "results": results
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 기준선 저장: {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+오프라인 벤치마크용 로컬 스텁 HTTP 서버
+- GET  /rss/search?q=...          : Google News RSS 대역 (fixtures/rss/*.xml, 종목명 치환, ETag/304 지원)
+- POST /v1/chat/completions       : OpenAI Chat Completions 대역 (단일/일괄 요약 JSON)
+- POST /api/update                : 대시보드 서버 대역 (버전만 증가)
+- 엔드포인트별 지연(ms)을 지정해 실제 업스트림 응답 시간을 흉내냄
+
+사용법 (단독 실행): python benchmarks/stub_server.py --port 8900 --rss-latency-ms 80 --gpt-latency-ms 600
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RSS_FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures", "rss")
+
+BATCH_ITEM_RE = re.compile(r"\[id=(\d+)\] 종목: (.+?) / 등락률")
+SINGLE_NAME_RE = re.compile(r"종목: (.+)")
+
+
+def load_rss_fixtures():
+    """fixtures/rss/*.xml (이름순) - '{stock}', '{slug}' 자리에 종목명/식별자 치환"""
+    fixtures = []
+    for name in sorted(os.listdir(RSS_FIXTURES)):
+        if name.endswith(".xml"):
+            with open(os.path.join(RSS_FIXTURES, name), "r", encoding="utf-8") as f:
+                fixtures.append(f.read())
+    return fixtures
+
+
+class StubServer:
+    """스레드에서 돌아가는 스텁 서버 (with 문 또는 start()/stop())"""
+
+    def __init__(self, port: int = 0, rss_latency_ms: float = 80, gpt_latency_ms: float = 600,
+                 gpt_item_latency_ms: float = 40, update_latency_ms: float = 5):
+        self.rss_latency = rss_latency_ms / 1000
+        self.gpt_latency = gpt_latency_ms / 1000
+        self.gpt_item_latency = gpt_item_latency_ms / 1000
+        self.update_latency = update_latency_ms / 1000
+        self.rss_fixtures = load_rss_fixtures()
+        self.version = 0
+        self.requests = {"rss": 0, "rss_not_modified": 0, "gpt_single": 0, "gpt_batch": 0, "update": 0}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, key: str):
+        with self._lock:
+            self.requests[key] += 1
+
+    # -------- 응답 생성 --------
+    def rss_body(self, query: str) -> bytes:
+        stock = query.replace(" when:1d", "").strip()
+        fixture = self.rss_fixtures[zlib.crc32(stock.encode("utf-8")) % len(self.rss_fixtures)]
+        slug = format(zlib.crc32(stock.encode("utf-8")), "08x")
+        return fixture.replace("{stock}", stock).replace("{slug}", slug).encode("utf-8")
+
+    @staticmethod
+    def summary_item(name: str) -> dict:
+        return {
+            "bullish": f"{name} 수급 개선과 실적 기대감",
+            "bearish": f"{name} 단기 과열에 따른 차익실현 우려",
+            "bullish_idx": 1,
+            "bearish_idx": 2
+        }
+
+    def completion(self, payload: dict) -> dict:
+        prompt = payload["messages"][-1]["content"]
+        batch = BATCH_ITEM_RE.findall(prompt)
+        if batch:
+            self.count("gpt_batch")
+            time.sleep(self.gpt_latency + self.gpt_item_latency * len(batch))
+            content = {"stocks": [{"id": int(i), **self.summary_item(name)} for i, name in batch]}
+        else:
+            self.count("gpt_single")
+            time.sleep(self.gpt_latency)
+            match = SINGLE_NAME_RE.search(prompt)
+            content = self.summary_item(match.group(1).strip() if match else "종목")
+
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(content, ensure_ascii=False)},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self, status: int, data: dict):
+                self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json")
+
+            def _read_json(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path == "/rss/search":
+                    server.count("rss")
+                    time.sleep(server.rss_latency)
+                    query = parse_qs(parsed.query).get("q", [""])[0]
+                    body = server.rss_body(query)
+                    etag = f'"{zlib.crc32(body):08x}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        server.count("rss_not_modified")
+                        self._send(304, b"", "application/xml; charset=utf-8", {"ETag": etag})
+                    else:
+                        self._send(200, body, "application/xml; charset=utf-8", {"ETag": etag})
+                else:
+                    self._json(404, {"error": "not found"})
+
+            def do_POST(self):
+                parsed = urlparse(self.path)
+                payload = self._read_json()
+                if parsed.path.endswith("/chat/completions"):
+                    self._json(200, server.completion(payload))
+                elif parsed.path == "/api/update":
+                    server.count("update")
+                    time.sleep(server.update_latency)
+                    with server._lock:
+                        server.version += 1
+                        version = server.version
+                    self._json(200, {"status": "success", "version": version})
+                else:
+                    self._json(404, {"error": "not found"})
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS/OpenAI/API 스텁 서버")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--rss-latency-ms", type=float, default=80)
+    parser.add_argument("--gpt-latency-ms", type=float, default=600)
+    parser.add_argument("--gpt-item-latency-ms", type=float, default=40)
+    args = parser.parse_args()
+
+    server = StubServer(args.port, args.rss_latency_ms, args.gpt_latency_ms, args.gpt_item_latency_ms)
+    print(f"스텁 서버: {server.url}")
+    print(f"  GOOGLE_NEWS_RSS_URL={server.url}/rss/search")
+    print(f"  OPENAI_BASE_URL={server.url}/v1")
+    print(f"  API_URL={server.url}/api/update")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+gunicorn 설정 (멀티 워커)
+- 워커 간 스냅샷은 mmap 공유 파일로 동기화 (SNAPSHOT_SHARED_FILE)
+- SSE 연결이 스레드를 점유하므로 gthread 워커 사용
+  워커당 동시 SSE 연결은 SSE_MAX_STREAMS(기본 GUNICORN_THREADS의 절반)로 제한,
+  초과분은 503을 받고 /api/stocks 폴링으로 대체 → 나머지 스레드는 일반 요청/헬스체크용
+  (전체 SSE 한도 = WEB_CONCURRENCY x SSE_MAX_STREAMS, 기본 2 x 16 = 32)
+- 스크래퍼는 파일 락을 잡은 워커 하나에서만 실행
+"""
+
+import os
+
+os.environ.setdefault('SNAPSHOT_SHARED_FILE', '/tmp/hot-cheetos-snapshot.bin')
+os.environ.setdefault('METRICS_FILE', '/tmp/hot-cheetos-metrics.prom')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '32'))
+timeout = 120
+accesslog = None
+
+
+def post_worker_init(worker):
+    """포크된 워커마다 백그라운드 작업 시작"""
+    from app import start_background_tasks
+    start_background_tasks()
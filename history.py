@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+순위 스냅샷 이력 저장소
+- 사이클마다 (시각, 종목, 순위, 가격, 등락률)을 숫자로 변환해 보관
+- array 기반 열 지향 링 버퍼: 행당 30바이트, 용량 초과 시 가장 오래된 행부터 덮어씀
+- 종목 시계열 조회, 최근 N분 급변 종목 조회
+"""
+
+import math
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+
+def parse_price(text) -> float:
+    """'87,500원' → 87500.0 (실패 시 NaN)"""
+    try:
+        return float(str(text).replace(',', '').replace('원', '').strip())
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def parse_rate(text) -> float:
+    """'+25.12%' → 25.12 (실패 시 NaN)"""
+    try:
+        return float(str(text).replace('%', '').replace('+', '').strip())
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class RankingHistory:
+    """고정 크기 열 지향 랭킹 이력 (스레드 안전)"""
+
+    def __init__(self, max_rows: int = 100000, max_names: int = 4096):
+        self.capacity = max(1, max_rows)
+        self.max_names = max_names
+
+        # 열별 배열을 미리 할당 (메모리 상한 고정)
+        self._ts = array('d', [0.0]) * self.capacity
+        self._name_id = array('I', [0]) * self.capacity
+        self._rank = array('H', [0]) * self.capacity
+        self._price = array('d', [0.0]) * self.capacity
+        self._rate = array('d', [0.0]) * self.capacity
+
+        self._start = 0  # 가장 오래된 행 위치
+        self._size = 0
+        self._names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, name: str) -> bool:
+        """이력에 한 번이라도 기록된 종목인지 (이름표 정리 전까지)"""
+        return name in self._name_ids
+
+    def _slot(self, i: int) -> int:
+        """논리 인덱스(0=가장 오래됨) → 배열 위치"""
+        return (self._start + i) % self.capacity
+
+    def _intern(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            if len(self._names) >= self.max_names:
+                self._compact_names()
+            name_id = len(self._names)
+            self._names.append(name)
+            self._name_ids[name] = name_id
+        return name_id
+
+    def _compact_names(self):
+        """살아 있는 행이 참조하는 종목명만 남기고 id 재할당"""
+        remap: Dict[int, int] = {}
+        names: List[str] = []
+        for i in range(self._size):
+            pos = self._slot(i)
+            old_id = self._name_id[pos]
+            if old_id not in remap:
+                remap[old_id] = len(names)
+                names.append(self._names[old_id])
+            self._name_id[pos] = remap[old_id]
+        self._names = names
+        self._name_ids = {name: i for i, name in enumerate(names)}
+
+    def record(self, stocks: List[dict], ts: float):
+        """스냅샷 한 건 추가 (용량 초과분은 오래된 행부터 제거)"""
+        with self._lock:
+            # 이진 탐색을 위해 시각은 항상 단조 증가하도록 보정
+            if self._size:
+                ts = max(ts, self._ts[self._slot(self._size - 1)])
+
+            for stock in stocks:
+                if self._size < self.capacity:
+                    pos = self._slot(self._size)
+                    self._size += 1
+                else:
+                    pos = self._start
+                    self._start = (self._start + 1) % self.capacity
+
+                self._ts[pos] = ts
+                self._name_id[pos] = self._intern(str(stock.get('name', '')))
+                self._rank[pos] = min(int(stock.get('rank') or 0), 65535)
+                self._price[pos] = parse_price(stock.get('price'))
+                self._rate[pos] = parse_rate(stock.get('rate'))
+
+    def _first_index_since(self, since: float) -> int:
+        """ts >= since 인 첫 논리 인덱스 (시각은 기록 순서대로 증가)"""
+        class _View:
+            def __len__(_):
+                return self._size
+
+            def __getitem__(_, i):
+                return self._ts[self._slot(i)]
+
+        return bisect_left(_View(), since)
+
+    @staticmethod
+    def _num(value: float) -> Optional[float]:
+        return None if math.isnan(value) else value
+
+    def series(self, name: str, since: float) -> List[dict]:
+        """종목 하나의 순위/가격/등락률 시계열"""
+        with self._lock:
+            name_id = self._name_ids.get(name)
+            if name_id is None:
+                return []
+
+            points = []
+            for i in range(self._first_index_since(since), self._size):
+                pos = self._slot(i)
+                if self._name_id[pos] != name_id:
+                    continue
+                points.append({
+                    'ts': self._ts[pos],
+                    'rank': self._rank[pos],
+                    'price': self._num(self._price[pos]),
+                    'rate': self._num(self._rate[pos])
+                })
+            return points
+
+    def movers(self, since: float, limit: int = 10) -> List[dict]:
+        """구간 내 처음/마지막 관측 기준 가격 변화율이 큰 종목"""
+        with self._lock:
+            first: Dict[int, int] = {}
+            last: Dict[int, int] = {}
+            for i in range(self._first_index_since(since), self._size):
+                pos = self._slot(i)
+                name_id = self._name_id[pos]
+                first.setdefault(name_id, pos)
+                last[name_id] = pos
+
+            result = []
+            for name_id, first_pos in first.items():
+                last_pos = last[name_id]
+                start_price = self._price[first_pos]
+                end_price = self._price[last_pos]
+                if math.isnan(start_price) or math.isnan(end_price) or start_price <= 0:
+                    continue
+
+                result.append({
+                    'name': self._names[name_id],
+                    'price_change_pct': round((end_price / start_price - 1) * 100, 2),
+                    'rate_change': self._num(round(self._rate[last_pos] - self._rate[first_pos], 2)),
+                    'rank_change': int(self._rank[first_pos]) - int(self._rank[last_pos]),
+                    'from': {'ts': self._ts[first_pos], 'rank': self._rank[first_pos],
+                             'price': start_price, 'rate': self._num(self._rate[first_pos])},
+                    'to': {'ts': self._ts[last_pos], 'rank': self._rank[last_pos],
+                           'price': end_price, 'rate': self._num(self._rate[last_pos])}
+                })
+
+        result.sort(key=lambda m: abs(m['price_change_pct']), reverse=True)
+        return result[:limit]
+
+    def memory_bytes(self) -> int:
+        """열 배열이 차지하는 고정 메모리"""
+        return sum(col.itemsize * len(col) for col in
+                   (self._ts, self._name_id, self._rank, self._price, self._rate))
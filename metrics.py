@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+파이프라인 단계별 메트릭 (Prometheus 텍스트 형식)
+- 카운터/히스토그램만 지원하는 경량 레지스트리 (외부 의존성 없음)
+- 단계별 소요 시간: 드라이버 시작, 페이지 로드, 파싱, RSS, GPT, 전송 등
+- 멀티 워커: 스크래퍼를 돌리는 워커가 렌더링 결과를 파일로 내보내고 나머지 워커는 그 파일을 서빙
+"""
+
+import os
+import time
+import tempfile
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    @property
+    def sample_name(self) -> str:
+        """HELP/TYPE 줄에 쓰는 이름 - 텍스트 형식 0.0.4에서는 샘플 이름과 같아야 함"""
+        return self.name
+
+    def header(self) -> List[str]:
+        return [f'# HELP {self.sample_name} {self.documentation}', f'# TYPE {self.sample_name} {self.kind}']
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    @property
+    def sample_name(self) -> str:
+        return f'{self.name}_total'
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self.header()
+        for key, value in items:
+            lines.append(f'{self.sample_name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램 (초 단위)"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}  # key → [버킷별 개수..., 합계, 개수]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """with 블록 소요 시간 기록 (예외가 나도 기록)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = self.header()
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{labels} {state[-1]}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(state[-2])}')
+            lines.append(f'{self.name}_count{labels} {state[-1]}')
+        return lines
+
+
+class Registry:
+    """메트릭 목록 + 텍스트 렌더링"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing  # 모듈 재임포트 시 같은 인스턴스 재사용
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def write_file(self, path: str):
+        """렌더링 결과를 원자적으로 파일에 기록 (다른 워커가 서빙)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.replace(tmp, path)
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+
+def read_file(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+# 전역 레지스트리와 파이프라인 메트릭
+registry = Registry()
+
+cycle_seconds = registry.histogram(
+    'scraper_cycle_seconds', '1회 수집 사이클 전체 소요 시간', ['result'])
+stage_seconds = registry.histogram(
+    'scraper_stage_seconds', '사이클 단계별 소요 시간 (driver_startup, page_load, ready, parse, enrich, publish 등)', ['stage'])
+rss_fetch_seconds = registry.histogram(
+    'scraper_rss_fetch_seconds', 'Google News RSS 요청 1건 소요 시간', ['result'])
+gpt_call_seconds = registry.histogram(
+    'scraper_gpt_call_seconds', 'GPT 호출 1회(재시도 각각) 소요 시간', ['kind', 'result'])
+gpt_retries = registry.counter(
+    'scraper_gpt_retries', 'GPT 재시도 횟수', ['kind'])
+news_cache_lookups = registry.counter(
+    'scraper_news_cache_lookups', 'NewsCache.get() 조회 결과', ['result'])
+news_cache_revalidations = registry.counter(
+    'scraper_news_cache_revalidations', '만료 항목 헤드라인 지문 재검증 결과 (unchanged면 GPT 생략)', ['result'])
+news_refreshes = registry.counter(
+    'scraper_news_background_refreshes', '유예 구간 항목 백그라운드 갱신 결과 (종목 수)', ['result'])
+news_lookups = registry.counter(
+    'scraper_news_lookups', '/api/news 종목별 요약 조회 결과 (cache, coalesced, fetched, unknown, error)', ['result'])
+publish_total = registry.counter(
+    'scraper_publish', '스냅샷 전송/반영 결과', ['mode', 'result'])
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+장 운영시간 기반 스크래퍼 스케줄러
+- KRX 거래일(주말/휴장일 제외)과 정규장 시간(KST)을 기준으로 실행 주기 결정
+- 장 시작/마감 직후·직전 구간은 짧은 주기, 장전/시간외는 느린 주기, 휴장 시에는 다음 장전까지 대기
+- 연속 실패 시 지수 백오프 + 지터, 사이클은 항상 순차 실행 (겹치지 않음)
+- 휴장일 표는 연도별 관리 대상: 기본 표에 없는 해는 KRX_HOLIDAYS로 넣어야 하며,
+  현재 연도가 빠져 있으면 주말만 휴장으로 보고 경고 로그를 남김
+"""
+
+import os
+import random
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Optional, Set, Tuple
+
+KST = timezone(timedelta(hours=9))
+
+# KRX 휴장일 (주말 제외, 연말 휴장일 포함) - 추가분은 KRX_HOLIDAYS 환경변수로 지정
+DEFAULT_KRX_HOLIDAYS = {
+    # 2025
+    '2025-01-01', '2025-01-27', '2025-01-28', '2025-01-29', '2025-01-30',
+    '2025-03-03', '2025-05-01', '2025-05-05', '2025-05-06', '2025-06-03',
+    '2025-06-06', '2025-08-15', '2025-10-03', '2025-10-06', '2025-10-07',
+    '2025-10-08', '2025-10-09', '2025-12-25', '2025-12-31',
+    # 2026
+    '2026-01-01', '2026-02-16', '2026-02-17', '2026-02-18', '2026-03-02',
+    '2026-05-01', '2026-05-05', '2026-05-25', '2026-06-03', '2026-08-17',
+    '2026-09-24', '2026-09-25', '2026-10-05', '2026-10-09', '2026-12-25',
+    '2026-12-31',
+    # 2027 (대체공휴일 포함 예상치 - KRX 휴장일 공지 후 확인)
+    '2027-01-01', '2027-02-08', '2027-02-09', '2027-03-01', '2027-05-05',
+    '2027-05-13', '2027-08-16', '2027-09-14', '2027-09-15', '2027-09-16',
+    '2027-10-04', '2027-10-11', '2027-12-27', '2027-12-31',
+}
+
+
+def _env_time(name: str, default: str) -> dtime:
+    hour, minute = os.environ.get(name, default).split(':')
+    return dtime(int(hour), int(minute))
+
+
+def load_holidays() -> Set[date]:
+    """기본 휴장일 + KRX_HOLIDAYS (쉼표 구분 YYYY-MM-DD)"""
+    extra = [d.strip() for d in os.environ.get('KRX_HOLIDAYS', '').split(',') if d.strip()]
+    return {date.fromisoformat(d) for d in DEFAULT_KRX_HOLIDAYS.union(extra)}
+
+
+class MarketScheduler:
+    """현재 시각의 장 구간과 다음 실행까지의 대기 시간 계산"""
+
+    def __init__(self, regular_interval: float = 15):
+        self.holidays = load_holidays()
+
+        self.pre_open = _env_time('MARKET_PRE_OPEN', '08:30')
+        self.open = _env_time('MARKET_OPEN', '09:00')
+        self.close = _env_time('MARKET_CLOSE', '15:30')
+        self.after_close = _env_time('MARKET_AFTER_CLOSE', '18:00')  # 시간외 단일가 종료
+
+        self.burst_minutes = int(os.environ.get('SCHED_BURST_MINUTES', '30'))
+        self.burst_interval = float(os.environ.get('SCHED_BURST_INTERVAL', '5'))
+        self.regular_interval = float(os.environ.get('SCHED_REGULAR_INTERVAL', regular_interval))
+        self.edge_interval = float(os.environ.get('SCHED_EDGE_INTERVAL', '60'))
+        self.closed_max_sleep = float(os.environ.get('SCHED_CLOSED_MAX_SLEEP', '1800'))
+
+        self.backoff_base = float(os.environ.get('SCHED_BACKOFF_BASE', '10'))
+        self.backoff_max = float(os.environ.get('SCHED_BACKOFF_MAX', '300'))
+        self.failures = 0
+
+        self.holiday_years = {d.year for d in self.holidays}
+        self._warned_years: Set[int] = set()
+
+    @staticmethod
+    def now() -> datetime:
+        return datetime.now(KST)
+
+    def is_trading_day(self, day: date) -> bool:
+        if day.year not in self.holiday_years and day.year not in self._warned_years:
+            self._warned_years.add(day.year)
+            print(f"⚠️ {day.year}년 KRX 휴장일 정보 없음 - 주말만 휴장으로 처리합니다. "
+                  f"KRX_HOLIDAYS 환경변수(또는 DEFAULT_KRX_HOLIDAYS)에 휴장일을 추가하세요", flush=True)
+        return day.weekday() < 5 and day not in self.holidays
+
+    def _at(self, day: date, t: dtime) -> datetime:
+        return datetime.combine(day, t, tzinfo=KST)
+
+    def phase(self, now: Optional[datetime] = None) -> Tuple[str, Optional[float]]:
+        """(구간 이름, 실행 주기 초) - 휴장 구간이면 주기는 None"""
+        now = (now or self.now()).astimezone(KST)
+        day = now.date()
+        if not self.is_trading_day(day):
+            return 'holiday', None
+
+        burst = timedelta(minutes=self.burst_minutes)
+        opened = self._at(day, self.open)
+        closed = self._at(day, self.close)
+
+        if now < self._at(day, self.pre_open):
+            return 'closed', None
+        if now < opened:
+            return 'pre_open', self.edge_interval
+        if now < opened + burst:
+            return 'open_burst', self.burst_interval
+        if now < closed - burst:
+            return 'regular', self.regular_interval
+        if now < closed:
+            return 'close_burst', self.burst_interval
+        if now < self._at(day, self.after_close):
+            return 'after_hours', self.edge_interval
+        return 'closed', None
+
+    def next_session_start(self, now: Optional[datetime] = None) -> datetime:
+        """다음 거래일 장전 시작 시각 (오늘 장전 전이면 오늘)"""
+        now = (now or self.now()).astimezone(KST)
+        day = now.date()
+        if self.is_trading_day(day) and now < self._at(day, self.pre_open):
+            return self._at(day, self.pre_open)
+
+        day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return self._at(day, self.pre_open)
+
+    def record(self, ok: bool):
+        """사이클 결과 반영 (연속 실패 횟수)"""
+        self.failures = 0 if ok else self.failures + 1
+
+    def _backoff(self) -> float:
+        """연속 실패 시 지수 백오프 (지터 포함)"""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (self.failures - 1))
+        return random.uniform(delay / 2, delay)
+
+    def next_delay(self, started: datetime, now: Optional[datetime] = None) -> Tuple[float, str]:
+        """다음 사이클 시작까지 대기 초와 구간 이름
+
+        주기는 직전 사이클 시작 시각 기준 - 사이클이 주기보다 길었으면 바로 다음 회차
+        """
+        now = (now or self.now()).astimezone(KST)
+        name, interval = self.phase(now)
+
+        if interval is None:
+            # 휴장: 다음 장전까지 대기 (시계 보정을 위해 최대 대기 시간 단위로 끊어서)
+            delay = (self.next_session_start(now) - now).total_seconds()
+            delay = min(delay, self.closed_max_sleep)
+        else:
+            elapsed = (now - started.astimezone(KST)).total_seconds()
+            delay = max(0.0, interval - elapsed)
+
+        if self.failures:
+            delay = max(delay, self._backoff())
+        return delay, name
@@ -13,7 +13,8 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException
+from bs4 import BeautifulSoup, SoupStrainer
 
 import os
 import re
@@ -21,14 +22,27 @@ import time
 import json
 import random
 import requests
+from requests.adapters import HTTPAdapter
 import shutil
+import fcntl
+import hashlib
+import sqlite3
+import atexit
+import threading
 import subprocess
+import base64
 import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple, List
+from typing import Callable, Dict, Optional, Tuple, List
 from urllib.parse import quote_plus
 from dotenv import load_dotenv
 
+import metrics
+from snapshots import compute_delta
+
 # =========================
 # 환경변수
 # =========================
@@ -36,103 +50,351 @@ load_dotenv()
 API_URL = os.getenv("API_URL", "http://127.0.0.1:8080/api/update")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # 프록시/로컬 스텁 서버용
 OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "12"))
 OPENAI_RETRIES = int(os.getenv("OPENAI_RETRIES", "2"))
 MAX_LINE_LEN = int(os.getenv("NEWS_MAX_LINE_LEN", "50"))
+GOOGLE_NEWS_RSS_URL = os.getenv("GOOGLE_NEWS_RSS_URL", "https://news.google.com/rss/search")
+RSS_VALIDATOR_CACHE_SIZE = int(os.getenv("RSS_VALIDATOR_CACHE_SIZE", "512"))
+RSS_DRAIN_MAX_BYTES = int(os.getenv("RSS_DRAIN_MAX_BYTES", "262144"))  # 남은 본문이 이보다 작으면 비우고 커넥션 재사용
 CACHE_DURATION_MINUTES = int(os.getenv("NEWS_CACHE_MINUTES", "60"))
+NEWS_CACHE_DB = os.getenv("NEWS_CACHE_DB", "news_cache.db")
+NEWS_CACHE_RETAIN_MINUTES = int(os.getenv("NEWS_CACHE_RETAIN_MINUTES", "1440"))  # 만료 후 재검증용 보관
+NEWS_CACHE_STALE_GRACE_MINUTES = int(os.getenv("NEWS_CACHE_STALE_GRACE_MINUTES", "30"))  # 0이면 만료 즉시 동기 갱신
+NEWS_CACHE_MAX_ENTRIES = int(os.getenv("NEWS_CACHE_MAX_ENTRIES", "2000"))  # 메모리 LRU 크기 (0이면 무제한, 나머지는 DB에서 조회)
+NEWS_LOOKUP_LOCK_DIR = os.getenv("NEWS_LOOKUP_LOCK_DIR", "/tmp")  # 프로세스 간 온디맨드 요약 중복 방지 락 (비우면 프로세스 내에서만)
+NEWS_LOOKUP_LOCK_BUCKETS = max(1, int(os.getenv("NEWS_LOOKUP_LOCK_BUCKETS", "32")))  # 락 파일 수 (종목명 해시로 분배)
+NEWS_LOOKUP_TIMEOUT = float(os.getenv("NEWS_LOOKUP_TIMEOUT", "60"))
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "1"))
+DRIVER_MAX_USES = int(os.getenv("DRIVER_MAX_USES", "50"))
+DRIVER_MAX_RSS_MB = int(os.getenv("DRIVER_MAX_RSS_MB", "600"))
+TOSS_RANKINGS = [k.strip() for k in os.getenv("TOSS_RANKINGS", "heavy_soar").split(",") if k.strip()] or ["heavy_soar"]  # 첫 번째가 기본 랭킹
+TOSS_LIVE_CHART_URL = "https://www.tossinvest.com/?live-chart={}"
+TOSS_RANK_DEPTH = max(1, min(int(os.getenv("TOSS_RANK_DEPTH", "10")), 100))  # 수집할 순위 수
+ENRICH_GPT_DEPTH = int(os.getenv("ENRICH_GPT_DEPTH", "20"))  # 이 순위까지 GPT 요약
+ENRICH_RSS_DEPTH = int(os.getenv("ENRICH_RSS_DEPTH", "50"))  # 이 순위까지 RSS + 규칙 기반 요약, 그 아래는 캐시만
+PAGE_READY_TIMEOUT = float(os.getenv("PAGE_READY_TIMEOUT", "15"))
+PAGE_ROW_SETTLE_MS = int(os.getenv("PAGE_ROW_SETTLE_MS", "400"))
+PAGE_NETWORK_IDLE_MS = int(os.getenv("PAGE_NETWORK_IDLE_MS", "500"))
+ENRICH_WORKERS = int(os.getenv("ENRICH_WORKERS", "6"))
+RSS_CONCURRENCY = int(os.getenv("RSS_CONCURRENCY", "4"))
+GPT_CONCURRENCY = int(os.getenv("GPT_CONCURRENCY", "3"))
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "8"))
+TOSS_CAPTURE_NETWORK = os.getenv("TOSS_CAPTURE_NETWORK", "true").lower() in ("1", "true", "yes")
+TOSS_LIGHT_LOAD = os.getenv("TOSS_LIGHT_LOAD", "true").lower() in ("1", "true", "yes")  # 랭킹 표에 불필요한 리소스 차단
+TOSS_PAGE_LOAD_STRATEGY = os.getenv("TOSS_PAGE_LOAD_STRATEGY", "eager")  # normal | eager (TOSS_LIGHT_LOAD일 때)
+TOSS_BLOCKED_URLS = [u.strip() for u in os.getenv("TOSS_BLOCKED_URLS", "").split(",") if u.strip()]  # 추가 차단 패턴
+TOSS_RANKING_URL_HINTS = [h.strip() for h in os.getenv("TOSS_RANKING_URL_HINTS", "ranking,rank").split(",") if h.strip()]
+API_DELTA = os.getenv("API_DELTA", "true").lower() in ("1", "true", "yes")
+TWO_PHASE_PUBLISH = os.getenv("TWO_PHASE_PUBLISH", "true").lower() in ("1", "true", "yes")
+OPENAI_BATCH = os.getenv("OPENAI_BATCH", "true").lower() in ("1", "true", "yes")
+OPENAI_BATCH_TIMEOUT = float(os.getenv("OPENAI_BATCH_TIMEOUT", "30"))
 
 # =========================
 # 뉴스 캐시 시스템
 # =========================
+def headline_fingerprint(headlines: List[dict]) -> str:
+    """헤드라인 집합의 해시 (순서 무관, 제목+링크 기준)"""
+    lines = sorted(f"{h.get('title', '')}\t{h.get('link', '')}" for h in headlines or [])
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()[:32]
+
 class NewsCache:
-    """1시간 동안 뉴스 캐싱하여 API 비용 절감"""
-    def __init__(self, cache_duration_minutes: int = 60):
-        self.cache: Dict[str, Tuple[dict, datetime]] = {}
+    """1시간 동안 뉴스 캐싱하여 API 비용 절감
+    
+    - SQLite(WAL) 저장소: 종목 단위 upsert, 트랜잭션으로 원자적/크래시 안전
+    - 요약은 종목명 + 헤드라인 지문(fingerprint)으로 보관
+    - TTL이 지난 항목도 보관 기간(retain) 동안은 남겨 두고, 헤드라인이 그대로면 재검증으로 수명 연장
+    - 만료 직후 유예 구간(stale_grace)에는 기존 요약을 바로 쓰고 백그라운드에서 갱신
+    - 보관 기간이 지난 항목은 DELETE로만 제거 (전체 재작성 없음)
+    - 메모리는 최근 사용 max_entries개만 유지(LRU), 없거나 만료된 항목은 DB에서 다시 읽음
+      (다른 프로세스가 저장한 요약도 보임)
+    - 기존 news_cache.json은 DB가 비어 있을 때 한 번 이관
+    """
+    def __init__(self, cache_duration_minutes: int = 60, db_path: str = "news_cache.db",
+                 retain_minutes: int = 1440, stale_grace_minutes: int = 0, max_entries: int = 0):
+        self.cache: "OrderedDict[str, Tuple[dict, datetime, str]]" = OrderedDict()  # 종목 → (요약, 저장/재검증 시각, 지문)
+        self.max_entries = max_entries
         self.cache_duration = timedelta(minutes=cache_duration_minutes)
-        self.cache_file = "news_cache.json"
+        self.stale_grace = timedelta(minutes=stale_grace_minutes)
+        self.retain_duration = max(self.cache_duration + self.stale_grace, timedelta(minutes=retain_minutes))
+        self.cache_file = "news_cache.json"  # 구 형식 (이관용)
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._db = None
+        self._open_db()
         self.load_cache()
 
+    def _open_db(self):
+        """SQLite 연결 및 스키마 준비"""
+        try:
+            self._db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS news_cache ("
+                " stock TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " ts REAL NOT NULL,"
+                " fingerprint TEXT)"
+            )
+            # 지문 컬럼 이전 스키마 보정
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(news_cache)")}
+            if "fingerprint" not in columns:
+                self._db.execute("ALTER TABLE news_cache ADD COLUMN fingerprint TEXT")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_news_cache_ts ON news_cache(ts)")
+            self._db.commit()
+        except Exception as e:
+            print(f"⚠️ 캐시 DB 열기 실패, 메모리 캐시만 사용: {e}", flush=True)
+            self._db = None
+
+    @staticmethod
+    def _normalize(value) -> dict:
+        """문자열이면 구 형식, dict면 신 형식"""
+        if isinstance(value, str):
+            return {
+                "summary": value,
+                "bullish_url": "",
+                "bearish_url": "",
+                "sources": []
+            }
+        return value
+
+    @classmethod
+    def _fingerprint_of(cls, value) -> str:
+        """요약에 포함된 헤드라인(sources)으로 지문 계산"""
+        return headline_fingerprint(cls._normalize(value).get("sources", []))
+
+    def _cutoff(self) -> float:
+        return (datetime.now() - self.cache_duration).timestamp()
+
+    def _retain_cutoff(self) -> float:
+        return (datetime.now() - self.retain_duration).timestamp()
+
+    def _remember(self, stock_name: str, entry: Tuple[dict, datetime, str]):
+        """메모리 LRU에 넣고 한도를 넘으면 가장 오래 안 쓴 항목 제거 (DB에는 남음)"""
+        self.cache[stock_name] = entry
+        self.cache.move_to_end(stock_name)
+        while self.max_entries and len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+    def _load_row(self, stock_name: str) -> Optional[Tuple[dict, datetime, str]]:
+        """DB에서 종목 한 행 읽기 - 메모리보다 새 항목이면 메모리에 반영"""
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT value, ts, fingerprint FROM news_cache WHERE stock = ? AND ts >= ?",
+                (stock_name, self._retain_cutoff())
+            ).fetchone()
+        except Exception as e:
+            print(f"⚠️ 캐시 조회 실패: {e}", flush=True)
+            return None
+        if row is None:
+            return None
+        
+        value, ts, fingerprint = row
+        current = self.cache.get(stock_name)
+        if current is not None and current[1].timestamp() >= ts:
+            return current
+        value = json.loads(value)
+        entry = (value, datetime.fromtimestamp(ts), fingerprint or self._fingerprint_of(value))
+        self._remember(stock_name, entry)
+        return entry
+
+    def _migrate_json(self):
+        """구 형식 news_cache.json을 DB로 이관 (DB가 비어 있을 때만)"""
+        if not os.path.exists(self.cache_file):
+            return
+        if self._db.execute("SELECT 1 FROM news_cache LIMIT 1").fetchone():
+            return
+        
+        with open(self.cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        cutoff = self._cutoff()
+        rows = []
+        for stock, (value, ts_str) in data.items():
+            ts = datetime.fromisoformat(ts_str).timestamp()
+            if ts >= cutoff:
+                value = self._normalize(value)
+                rows.append((stock, json.dumps(value, ensure_ascii=False), ts, self._fingerprint_of(value)))
+        
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO news_cache (stock, value, ts, fingerprint) VALUES (?, ?, ?, ?)", rows
+            )
+        print(f"📦 news_cache.json 이관: {len(rows)}개 종목", flush=True)
+
     def load_cache(self):
-        """저장된 캐시 파일 로드"""
-        if os.path.exists(self.cache_file):
+        """저장된 캐시 로드 (보관 기간 내 키만 - 만료분은 재검증용)"""
+        if self._db is None:
+            return
+        
+        with self._lock:
             try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                now = datetime.now()
-                for stock, (value, ts_str) in data.items():
-                    ts = datetime.fromisoformat(ts_str)
-                    if now - ts < self.cache_duration:
-                        self.cache[stock] = (value, ts)
+                self._migrate_json()
+                # 오래된 것부터 넣어 LRU 한도를 넘으면 최근 항목만 남음
+                rows = self._db.execute(
+                    "SELECT stock, value, ts, fingerprint FROM news_cache WHERE ts >= ? ORDER BY ts",
+                    (self._retain_cutoff(),)
+                ).fetchall()
+                for stock, value, ts, fingerprint in rows:
+                    value = json.loads(value)
+                    self._remember(stock, (value, datetime.fromtimestamp(ts), fingerprint or self._fingerprint_of(value)))
                 print(f"📦 캐시 로드: {len(self.cache)}개 종목", flush=True)
             except Exception as e:
                 print(f"⚠️ 캐시 로드 실패: {e}", flush=True)
 
     def save_cache(self):
-        """캐시를 파일로 저장"""
-        try:
-            data = {}
-            for stock, (value, ts) in self.cache.items():
-                # 문자열이면 구 형식, dict면 신 형식
-                if isinstance(value, str):
-                    # 구 형식을 신 형식으로 변환
-                    value = {
-                        "summary": value,
-                        "bullish_url": "",
-                        "bearish_url": "",
-                        "sources": []
-                    }
-                data[stock] = (value, ts.isoformat())
-            
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"⚠️ 캐시 저장 실패: {e}", flush=True)
-
-    def get(self, stock_name: str) -> Optional[dict]:
-        """캐시에서 데이터 가져오기"""
-        if stock_name in self.cache:
-            value, cached_time = self.cache[stock_name]
-            if datetime.now() - cached_time < self.cache_duration:
-                remaining = self.cache_duration - (datetime.now() - cached_time)
-                print(f"    💾 캐시 사용: {stock_name} (남은시간: {remaining.seconds//60}분)", flush=True)
-                # 문자열이면 구 형식, dict면 신 형식
-                if isinstance(value, str):
-                    return {
-                        "summary": value,
-                        "bullish_url": "",
-                        "bearish_url": "",
-                        "sources": []
-                    }
-                return value
-            else:
-                del self.cache[stock_name]
+        """WAL 체크포인트 (쓰기는 set()마다 이미 커밋됨)"""
+        if self._db is None:
+            return
+        
+        with self._lock:
+            try:
+                self._db.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            except Exception as e:
+                print(f"⚠️ 캐시 저장 실패: {e}", flush=True)
+
+    def get(self, stock_name: str, on_stale: Optional[Callable[[str], None]] = None) -> Optional[dict]:
+        """캐시에서 데이터 가져오기 (TTL 이내만, 만료 항목은 재검증용으로 유지)
+        
+        on_stale이 주어지면 만료 후 유예 구간(stale_grace) 이내 항목도 즉시 반환하고
+        on_stale(종목명)으로 갱신이 필요함을 알린다 (stale-while-revalidate).
+        """
+        with self._lock:
+            entry = self.cache.get(stock_name)
+            if entry is None or datetime.now() - entry[1] >= self.cache_duration:
+                entry = self._load_row(stock_name) or entry  # LRU에서 밀려났거나 다른 프로세스가 갱신했을 수 있음
+            if entry is not None:
+                self.cache.move_to_end(stock_name)
+                value, cached_time, _ = entry
+                age = datetime.now() - cached_time
+                if age < self.cache_duration:
+                    remaining = self.cache_duration - age
+                    print(f"    💾 캐시 사용: {stock_name} (남은시간: {remaining.seconds//60}분)", flush=True)
+                    metrics.news_cache_lookups.inc(result="hit")
+                    return self._normalize(value)
+                if on_stale is not None and age < self.cache_duration + self.stale_grace:
+                    print(f"    💾 만료 캐시 사용 (갱신 예약): {stock_name}", flush=True)
+                    metrics.news_cache_lookups.inc(result="stale")
+                    on_stale(stock_name)
+                    return self._normalize(value)
+                metrics.news_cache_lookups.inc(result="expired")
+                return None
+        metrics.news_cache_lookups.inc(result="miss")
         return None
 
-    def set(self, stock_name: str, value: dict):
-        """캐시에 데이터 저장"""
-        self.cache[stock_name] = (value, datetime.now())
-        self.save_cache()
+    def known(self, stock_name: str) -> bool:
+        """보관 기간 안에 요약을 만든 적 있는 종목인지 (만료 항목 포함, 메모리 → DB)"""
+        with self._lock:
+            return stock_name in self.cache or self._load_row(stock_name) is not None
 
-    def cleanup(self):
-        """만료된 캐시 정리"""
+    def peek(self, stock_name: str) -> Optional[dict]:
+        """만료 여부와 관계없이 보관 중인 요약 (지표/로그 없음, 임시 표시용)"""
+        with self._lock:
+            entry = self.cache.get(stock_name)
+            return self._normalize(entry[0]) if entry else None
+
+    def revalidate(self, stock_name: str, fingerprint: str) -> Optional[dict]:
+        """헤드라인 지문이 저장된 요약과 같으면 TTL을 연장하고 기존 요약 반환 (GPT 호출 생략)"""
+        with self._lock:
+            entry = self.cache.get(stock_name)
+            if entry is None or entry[2] != fingerprint:
+                if entry is not None:
+                    metrics.news_cache_revalidations.inc(result="changed")
+                return None
+            
+            value = entry[0]
+            now = datetime.now()
+            self._remember(stock_name, (value, now, fingerprint))
+            metrics.news_cache_revalidations.inc(result="unchanged")
+            print(f"    ♻️ 헤드라인 동일 - 요약 재사용: {stock_name}", flush=True)
+            
+            if self._db is not None:
+                try:
+                    with self._db:
+                        self._db.execute(
+                            "UPDATE news_cache SET ts = ? WHERE stock = ? AND fingerprint = ?",
+                            (now.timestamp(), stock_name, fingerprint)
+                        )
+                except Exception as e:
+                    print(f"⚠️ 캐시 갱신 실패: {e}", flush=True)
+            return self._normalize(value)
+
+    def set(self, stock_name: str, value: dict, fingerprint: Optional[str] = None):
+        """캐시에 데이터 저장 (해당 종목 한 행만 upsert)"""
         now = datetime.now()
-        expired = [stock for stock, (_, ts) in self.cache.items() 
-                  if now - ts >= self.cache_duration]
-        for stock in expired:
-            del self.cache[stock]
-        if expired:
-            print(f"🗑️ 만료 캐시 정리: {len(expired)}개", flush=True)
-            self.save_cache()
+        fingerprint = fingerprint or self._fingerprint_of(value)
+        with self._lock:
+            self._remember(stock_name, (value, now, fingerprint))
+            if self._db is None:
+                return
+            try:
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO news_cache (stock, value, ts, fingerprint) VALUES (?, ?, ?, ?)",
+                        (stock_name, json.dumps(value, ensure_ascii=False), now.timestamp(), fingerprint)
+                    )
+            except Exception as e:
+                print(f"⚠️ 캐시 저장 실패: {e}", flush=True)
+
+    def cleanup(self):
+        """보관 기간이 지난 캐시 정리"""
+        with self._lock:
+            now = datetime.now()
+            expired = [stock for stock, (_, ts, _) in self.cache.items() 
+                      if now - ts >= self.retain_duration]
+            for stock in expired:
+                del self.cache[stock]
+            
+            # 다른 프로세스가 남긴 만료 행까지 한 번에 삭제
+            removed = 0
+            if self._db is not None:
+                try:
+                    with self._db:
+                        removed = self._db.execute(
+                            "DELETE FROM news_cache WHERE ts < ?", (self._retain_cutoff(),)
+                        ).rowcount
+                except Exception as e:
+                    print(f"⚠️ 캐시 정리 실패: {e}", flush=True)
+            
+            if expired or removed:
+                print(f"🗑️ 만료 캐시 정리: {max(len(expired), removed)}개", flush=True)
 
 # 전역 캐시 인스턴스
-news_cache = NewsCache(CACHE_DURATION_MINUTES)
+news_cache = NewsCache(CACHE_DURATION_MINUTES, NEWS_CACHE_DB, NEWS_CACHE_RETAIN_MINUTES,
+                       NEWS_CACHE_STALE_GRACE_MINUTES, NEWS_CACHE_MAX_ENTRIES)
 
 # =========================
 # 크롬 드라이버 설정
 # =========================
-def setup_driver():
+# 경량 로드에서 차단할 요청 (CDP Network.setBlockedURLs 와일드카드 패턴)
+# 이미지/폰트/미디어와 분석·광고 스크립트만 - 랭킹 표를 그리는 JS/CSS와 API 응답은 그대로 둠
+DEFAULT_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*amplitude.com*", "*braze.com*", "*sentry.io*",
+    "*datadoghq.com*", "*clarity.ms*", "*hotjar.com*",
+]
+
+def apply_request_blocking(driver):
+    """현재 탭에 요청 차단 적용 (CDP 설정은 탭마다 따로라 새 탭을 열 때마다 호출)"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": DEFAULT_BLOCKED_URLS + TOSS_BLOCKED_URLS})
+    except Exception as e:
+        print(f"  ⚠️ 요청 차단 설정 실패: {e}", flush=True)
+
+def setup_driver(light_load: Optional[bool] = None):
+    """Chrome 드라이버 생성 (light_load: 리소스 차단 + eager 로드, 기본 TOSS_LIGHT_LOAD)"""
     print("🌐 Chrome 드라이버 설정 시작...", flush=True)
     
+    if light_load is None:
+        light_load = TOSS_LIGHT_LOAD
+    
     options = Options()
     
     # 헤드리스 모드
@@ -143,10 +405,28 @@ def setup_driver():
     options.add_argument('--disable-setuid-sandbox')
     options.add_argument('--window-size=1920,1080')
     
+    # 여러 랭킹 탭을 동시에 로드할 때 백그라운드 탭이 느려지지 않도록
+    options.add_argument('--disable-background-timer-throttling')
+    options.add_argument('--disable-backgrounding-occluded-windows')
+    options.add_argument('--disable-renderer-backgrounding')
+    
     # 추가 옵션
     options.add_argument('--disable-blink-features=AutomationControlled')
     options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
     
+    # 네트워크 응답 캡처용 성능 로그 (CDP Network 이벤트)
+    if TOSS_CAPTURE_NETWORK:
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    
+    # 경량 로드: 이미지/알림 끄기 + DOMContentLoaded에서 get() 반환 (준비 여부는 wait_for_ranking_ready가 판단)
+    if light_load:
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.default_content_setting_values.notifications': 2,
+        })
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.page_load_strategy = TOSS_PAGE_LOAD_STRATEGY
+    
     try:
         # chromedriver 경로 찾기
         chromedriver_path = shutil.which('chromedriver')
@@ -169,8 +449,11 @@ def setup_driver():
             else:
                 raise Exception("chromedriver를 찾을 수 없습니다")
         
-        driver = webdriver.Chrome(service=service, options=options)
-        print("✅ Chrome 드라이버 생성 완료", flush=True)
+        with metrics.stage_seconds.time(stage="driver_startup"):
+            driver = webdriver.Chrome(service=service, options=options)
+        if light_load:
+            apply_request_blocking(driver)
+        print(f"✅ Chrome 드라이버 생성 완료{' (경량 로드)' if light_load else ''}", flush=True)
         
         return driver
         
@@ -179,28 +462,235 @@ def setup_driver():
         raise
 
 # =========================
-# Google News RSS에서 뉴스 수집
+# HTTP 전송 계층 (커넥션 재사용)
 # =========================
-def fetch_google_news(stock_name: str, max_items: int = 5) -> List[dict]:
-    """Google News RSS에서 24시간 이내 뉴스 수집"""
-    query = quote_plus(f"{stock_name} when:1d")
-    url = f"https://news.google.com/rss/search?q={query}&hl=ko&gl=KR&ceid=KR:ko"
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    
+def _create_http_session() -> requests.Session:
+    """호스트별 keep-alive 커넥션 풀을 가진 공용 세션"""
+    session = requests.Session()
+    # pool_block은 쓰지 않음: requests는 풀 대기 시간 제한을 넘길 수 없어 반납이 누락되면 영원히 대기함
+    # 동시 요청 수는 RSS/GPT 세마포어로 풀 크기 안에서 제한되므로 보통은 풀 안의 연결만 재사용
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# 전역 HTTP 세션 (RSS, API 전송 공용)
+http_session = _create_http_session()
+atexit.register(http_session.close)
+
+# =========================
+# 드라이버 풀 (크롬 세션 재사용)
+# =========================
+def _process_tree_rss_mb(root_pid: int) -> float:
+    """프로세스와 모든 자식 프로세스의 RSS 합계(MB) - /proc 기반"""
+    children: Dict[int, List[int]] = {}
     try:
-        resp = requests.get(url, headers=headers, timeout=5)
-        resp.raise_for_status()
-    except Exception as e:
-        print(f"    ⚠️ 뉴스 RSS 실패: {e}", flush=True)
-        return []
+        pids = [int(p) for p in os.listdir('/proc') if p.isdigit()]
+    except OSError:
+        return 0.0
+    
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat', 'r') as f:
+                stat = f.read()
+            # "pid (comm) state ppid ..." - comm에 공백이 있을 수 있어 ')' 기준으로 분리
+            ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(pid)
+    
+    total_kb = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f'/proc/{pid}/status', 'r') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            pass
+        stack.extend(children.get(pid, []))
+    
+    return total_kb / 1024
+
+
+class DriverPool:
+    """크롬 세션을 사이클 간 재사용하는 드라이버 풀
+    
+    - 유휴 세션은 about:blank 상태로 유지
+    - 대여 시 헬스체크, 죽은 세션만 새로 생성
+    - N회 사용 또는 메모리 한도 초과 시 교체
+    """
+    def __init__(self, size: int = 1, max_uses: int = 50, max_rss_mb: int = 600):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self._idle: List[dict] = []
+        self._in_use: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    @staticmethod
+    def _is_alive(driver) -> bool:
+        """세션 응답 여부 확인"""
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _rss_mb(driver) -> float:
+        """chromedriver + 크롬 프로세스 트리 메모리(MB)"""
+        try:
+            return _process_tree_rss_mb(driver.service.process.pid)
+        except Exception:
+            return 0.0
+
+    @staticmethod
+    def _discard(entry: dict, reason: str):
+        print(f"♻️ 드라이버 교체 ({reason})", flush=True)
+        try:
+            entry["driver"].quit()
+        except Exception:
+            pass
+
+    def warm(self):
+        """풀 크기만큼 세션 미리 생성"""
+        with self._lock:
+            missing = self.size - len(self._idle)
+        for _ in range(missing):
+            entry = {"driver": setup_driver(), "uses": 0}
+            with self._lock:
+                self._idle.append(entry)
+
+    def acquire(self) -> dict:
+        """세션 대여 (없거나 죽었으면 새로 생성)"""
+        self._slots.acquire()
+        try:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            
+            if entry is not None and not self._is_alive(entry["driver"]):
+                self._discard(entry, "세션 응답 없음")
+                entry = None
+            
+            if entry is None:
+                entry = {"driver": setup_driver(), "uses": 0}
+            else:
+                print(f"♻️ 기존 드라이버 재사용 ({entry['uses']}회 사용됨)", flush=True)
+            
+            entry["uses"] += 1
+            with self._lock:
+                self._in_use[id(entry)] = entry
+            return entry
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, entry: dict, failed: bool = False):
+        """세션 반납 (수명/메모리 한도 확인)"""
+        with self._lock:
+            self._in_use.pop(id(entry), None)
+        try:
+            driver = entry["driver"]
+            
+            if failed and not self._is_alive(driver):
+                self._discard(entry, "오류 후 세션 응답 없음")
+                return
+            if entry["uses"] >= self.max_uses:
+                self._discard(entry, f"{entry['uses']}회 사용")
+                return
+            
+            rss = self._rss_mb(driver)
+            if self.max_rss_mb and rss > self.max_rss_mb:
+                self._discard(entry, f"메모리 {rss:.0f}MB > {self.max_rss_mb}MB")
+                return
+            
+            # 페이지 메모리 해제 후 유휴 상태로 보관
+            try:
+                driver.get("about:blank")
+            except Exception:
+                self._discard(entry, "초기화 실패")
+                return
+            
+            with self._lock:
+                self._idle.append(entry)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def session(self):
+        """with 블록 동안 드라이버 대여"""
+        entry = self.acquire()
+        failed = False
+        try:
+            yield entry["driver"]
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(entry, failed)
+
+    def shutdown(self):
+        """유휴 세션 모두 종료"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            try:
+                entry["driver"].quit()
+            except Exception:
+                pass
+        if idle:
+            print(f"🧹 드라이버 {len(idle)}개 종료", flush=True)
+
+    def terminate(self):
+        """대여 중인 세션까지 강제 종료 (사이클 타임아웃 시 블로킹 해제용)"""
+        with self._lock:
+            in_use = list(self._in_use.values())
+        for entry in in_use:
+            try:
+                entry["driver"].quit()
+            except Exception:
+                pass
+        self.shutdown()
+
+# 전역 드라이버 풀
+driver_pool = DriverPool(DRIVER_POOL_SIZE, DRIVER_MAX_USES, DRIVER_MAX_RSS_MB)
+atexit.register(driver_pool.shutdown)
+
+# =========================
+# Google News RSS에서 뉴스 수집
+# =========================
+# 업스트림별 동시 요청 수 제한
+_rss_slots = threading.BoundedSemaphore(max(1, RSS_CONCURRENCY))
+_gpt_slots = threading.BoundedSemaphore(max(1, GPT_CONCURRENCY))
+
+# 쿼리별 검증자(ETag/Last-Modified)와 직전 파싱 결과 (304 응답 시 재사용)
+_rss_validators: "OrderedDict[Tuple[str, int], dict]" = OrderedDict()
+_rss_validators_lock = threading.Lock()
+
+RSS_EXCLUDE_KEYWORDS = ["루머", "추정", "소문", "전망만", "예상만"]
+
+def _parse_rss_stream(stream, max_items: int) -> Tuple[List[dict], bool]:
+    """RSS를 읽는 만큼만 점진 파싱, 필터를 통과한 항목이 max_items개면 중단
     
+    반환: (항목 목록, 파싱 성공 여부)
+    """
     items = []
     try:
-        root = ET.fromstring(resp.content)
-        for item in root.findall(".//item"):
-            title_el = item.find("title")
-            link_el = item.find("link")
-            pub_el = item.find("pubDate")
+        for _, elem in ET.iterparse(stream, events=("end",)):
+            if elem.tag != "item":
+                continue
+            
+            title_el = elem.find("title")
+            link_el = elem.find("link")
+            pub_el = elem.find("pubDate")
             
             if title_el is not None and link_el is not None:
                 title = title_el.text.strip()
@@ -208,55 +698,197 @@ def fetch_google_news(stock_name: str, max_items: int = 5) -> List[dict]:
                 published = pub_el.text.strip() if pub_el is not None else ""
                 
                 # 루머나 추정성 기사 제외
-                if any(k in title for k in ["루머", "추정", "소문", "전망만", "예상만"]):
-                    continue
-                
-                items.append({
-                    "title": title,
-                    "link": link,
-                    "published": published
-                })
-                
-                if len(items) >= max_items:
-                    break
+                if not any(k in title for k in RSS_EXCLUDE_KEYWORDS):
+                    items.append({
+                        "title": title,
+                        "link": link,
+                        "published": published
+                    })
+            
+            elem.clear()  # 처리한 항목 메모리 해제
+            if len(items) >= max_items:
+                break
     except Exception as e:
         print(f"    ⚠️ RSS 파싱 실패: {e}", flush=True)
+        return items, False
+    
+    return items, True
+
+def _release_response(resp):
+    """스트리밍 응답 정리 - 남은 본문이 작으면 끝까지 읽어 커넥션을 풀에 반납, 크면 닫음
+    
+    읽다 만 본문을 그냥 close()하면 소켓이 닫혀 keep-alive가 깨진다.
+    """
+    try:
+        drained = 0
+        while drained <= RSS_DRAIN_MAX_BYTES:
+            chunk = resp.raw.read(16384)
+            if not chunk:
+                resp.raw.release_conn()
+                return
+            drained += len(chunk)
+    except Exception:
+        pass
+    resp.close()
+
+def fetch_google_news(stock_name: str, max_items: int = 5) -> List[dict]:
+    """Google News RSS에서 24시간 이내 뉴스 수집
+    
+    - 직전 응답의 ETag/Last-Modified로 조건부 요청, 304면 직전 파싱 결과 재사용
+    - 응답은 스트리밍으로 읽으며 필요한 항목 수를 채우면 나머지 본문은 읽지 않음
+    """
+    query = quote_plus(f"{stock_name} when:1d")
+    url = f"{GOOGLE_NEWS_RSS_URL}?q={query}&hl=ko&gl=KR&ceid=KR:ko"
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    
+    cache_key = (url, max_items)
+    with _rss_validators_lock:
+        cached = _rss_validators.get(cache_key)
+    if cached:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+    
+    with _rss_slots:
+        started = time.perf_counter()
+        resp = None
+        try:
+            resp = http_session.get(url, headers=headers, timeout=5, stream=True)
+            if resp.status_code == 304 and cached:
+                metrics.rss_fetch_seconds.observe(time.perf_counter() - started, result="not_modified")
+                with _rss_validators_lock:
+                    _rss_validators.move_to_end(cache_key)
+                return [dict(item) for item in cached["items"]]
+            resp.raise_for_status()
+            
+            resp.raw.decode_content = True  # gzip 등 전송 인코딩 해제
+            items, complete = _parse_rss_stream(resp.raw, max_items)
+        except Exception as e:
+            metrics.rss_fetch_seconds.observe(time.perf_counter() - started, result="error")
+            print(f"    ⚠️ 뉴스 RSS 실패: {e}", flush=True)
+            return []
+        finally:
+            # 오류/304/중간 중단 모두 커넥션 반납 (누락 시 풀 슬롯이 영구히 사라짐)
+            if resp is not None:
+                _release_response(resp)
+        metrics.rss_fetch_seconds.observe(time.perf_counter() - started, result="ok")
+    
+    # 파싱이 끝까지 성공한 경우만 검증자 저장
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    with _rss_validators_lock:
+        if complete and (etag or last_modified):
+            _rss_validators[cache_key] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "items": [dict(item) for item in items]
+            }
+            _rss_validators.move_to_end(cache_key)
+            while len(_rss_validators) > RSS_VALIDATOR_CACHE_SIZE:
+                _rss_validators.popitem(last=False)
+        else:
+            _rss_validators.pop(cache_key, None)
     
     return items
 
 # =========================
 # OpenAI GPT로 뉴스 요약
 # =========================
-def summarize_news_with_gpt(stock_name: str, rate: str, headlines: List[dict]) -> dict:
-    """GPT로 호재/악재 분석 및 링크 매핑"""
+_openai_client = None
+_openai_client_lock = threading.Lock()
+
+def _get_openai_client():
+    """OpenAI 클라이언트 재사용 (API 키/라이브러리 없으면 None)
     
-    # API 키 없으면 규칙 기반 요약
-    if not OPENAI_API_KEY:
-        return rule_based_summary(stock_name, rate, headlines)
+    httpx 커넥션 풀을 GPT 동시 호출 수에 맞춰 제한한다.
+    """
+    global _openai_client
     
-    # OpenAI SDK 임포트
-    try:
-        from openai import OpenAI
-        client = OpenAI(api_key=OPENAI_API_KEY)
-    except ImportError:
-        print("    ⚠️ OpenAI 라이브러리 없음", flush=True)
-        return rule_based_summary(stock_name, rate, headlines)
-    except Exception as e:
-        print(f"    ⚠️ OpenAI 초기화 실패: {e}", flush=True)
-        return rule_based_summary(stock_name, rate, headlines)
+    if not OPENAI_API_KEY:
+        return None
     
-    # 헤드라인 포맷팅
-    headlines_text = "\n".join([
+    with _openai_client_lock:
+        if _openai_client is None:
+            try:
+                import httpx
+                from openai import OpenAI
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=max(1, GPT_CONCURRENCY),
+                        max_keepalive_connections=max(1, GPT_CONCURRENCY)
+                    ),
+                    timeout=OPENAI_BATCH_TIMEOUT
+                )
+                _openai_client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, http_client=http_client)
+            except ImportError:
+                print("    ⚠️ OpenAI 라이브러리 없음", flush=True)
+            except Exception as e:
+                print(f"    ⚠️ OpenAI 초기화 실패: {e}", flush=True)
+        return _openai_client
+
+# GPT 시스템 프롬프트
+GPT_SYSTEM_PROMPT = (
+    "너는 한국 주식 뉴스 분석 전문가다. "
+    "실제 뉴스 헤드라인을 기반으로 호재와 악재를 각각 한 줄로 요약한다. "
+    "각 줄은 50자 이내로 작성한다."
+)
+
+def _format_headlines(headlines: List[dict]) -> str:
+    """헤드라인 번호 목록 (1부터 시작)"""
+    return "\n".join([
         f"{i}. {h['title']}" 
         for i, h in enumerate(headlines, 1)
     ]) if headlines else "뉴스 없음"
+
+def _parse_gpt_json(content: str):
+    """GPT 응답에서 코드블록 제거 후 JSON 파싱"""
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.strip("`").strip()
+        if content.startswith("json"):
+            content = content[4:].strip()
+    return json.loads(content)
+
+def _build_gpt_result(data: dict, headlines: List[dict]) -> dict:
+    """GPT JSON(bullish/bearish/idx)을 요약 결과로 변환"""
+    bullish = data.get('bullish') or '특별한 호재 없음'
+    bearish = data.get('bearish') or '특별한 악재 없음'
+    bull_idx = data.get('bullish_idx')
+    bear_idx = data.get('bearish_idx')
     
-    # GPT 프롬프트
-    system_prompt = (
-        "너는 한국 주식 뉴스 분석 전문가다. "
-        "실제 뉴스 헤드라인을 기반으로 호재와 악재를 각각 한 줄로 요약한다. "
-        "각 줄은 50자 이내로 작성한다."
-    )
+    # 링크 매핑
+    bull_url = ""
+    bear_url = ""
+    if isinstance(bull_idx, int) and headlines and 1 <= bull_idx <= len(headlines):
+        bull_url = headlines[bull_idx - 1]['link']
+    if isinstance(bear_idx, int) and headlines and 1 <= bear_idx <= len(headlines):
+        bear_url = headlines[bear_idx - 1]['link']
+    
+    # 길이 제한
+    if len(bullish) > MAX_LINE_LEN:
+        bullish = bullish[:MAX_LINE_LEN-1] + "…"
+    if len(bearish) > MAX_LINE_LEN:
+        bearish = bearish[:MAX_LINE_LEN-1] + "…"
+    
+    return {
+        "summary": f"🟢 호재: {bullish}\n🔴 악재: {bearish}",
+        "bullish_url": bull_url,
+        "bearish_url": bear_url,
+        "sources": headlines,
+        "summarizer": "gpt"
+    }
+
+def summarize_news_with_gpt(stock_name: str, rate: str, headlines: List[dict]) -> dict:
+    """GPT로 호재/악재 분석 및 링크 매핑"""
+    
+    # API 키/라이브러리 없으면 규칙 기반 요약
+    client = _get_openai_client()
+    if client is None:
+        return rule_based_summary(stock_name, rate, headlines)
+    
+    # 헤드라인 포맷팅
+    headlines_text = _format_headlines(headlines)
     
     user_prompt = f"""
 종목: {stock_name}
@@ -279,61 +911,37 @@ bearish_idx는 악재 근거가 되는 헤드라인 번호
     
     # GPT 호출 (재시도 포함)
     for attempt in range(OPENAI_RETRIES + 1):
+        started = None
         try:
             # 최신 SDK (v1.x) - timeout은 create 메소드에 직접 전달
-            response = client.chat.completions.create(
-                model=OPENAI_MODEL,
-                temperature=0.3,
-                max_tokens=200,
-                timeout=OPENAI_TIMEOUT,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
-            
-            content = response.choices[0].message.content.strip()
+            with _gpt_slots:
+                started = time.perf_counter()
+                response = client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    temperature=0.3,
+                    max_tokens=200,
+                    timeout=OPENAI_TIMEOUT,
+                    messages=[
+                        {"role": "system", "content": GPT_SYSTEM_PROMPT},
+                        {"role": "user", "content": user_prompt}
+                    ]
+                )
             
-            # JSON 파싱
-            if content.startswith("```"):
-                content = content.strip("`").strip()
-                if content.startswith("json"):
-                    content = content[4:].strip()
+            metrics.gpt_call_seconds.observe(time.perf_counter() - started, kind="single", result="ok")
+            started = None
             
-            data = json.loads(content)
-            
-            # 결과 포맷팅
-            bullish = data.get('bullish', '특별한 호재 없음')
-            bearish = data.get('bearish', '특별한 악재 없음')
-            bull_idx = data.get('bullish_idx')
-            bear_idx = data.get('bearish_idx')
-            
-            # 링크 매핑
-            bull_url = ""
-            bear_url = ""
-            if bull_idx and headlines and 1 <= bull_idx <= len(headlines):
-                bull_url = headlines[bull_idx - 1]['link']
-            if bear_idx and headlines and 1 <= bear_idx <= len(headlines):
-                bear_url = headlines[bear_idx - 1]['link']
-            
-            # 길이 제한
-            if len(bullish) > MAX_LINE_LEN:
-                bullish = bullish[:MAX_LINE_LEN-1] + "…"
-            if len(bearish) > MAX_LINE_LEN:
-                bearish = bearish[:MAX_LINE_LEN-1] + "…"
-            
-            return {
-                "summary": f"🟢 호재: {bullish}\n🔴 악재: {bearish}",
-                "bullish_url": bull_url,
-                "bearish_url": bear_url,
-                "sources": headlines
-            }
+            # JSON 파싱 및 결과 포맷팅
+            data = _parse_gpt_json(response.choices[0].message.content)
+            return _build_gpt_result(data, headlines)
             
         except json.JSONDecodeError:
             # JSON 파싱 실패 시 텍스트 그대로 사용
             return rule_based_summary(stock_name, rate, headlines)
         except Exception as e:
+            if started is not None:
+                metrics.gpt_call_seconds.observe(time.perf_counter() - started, kind="single", result="error")
             if attempt < OPENAI_RETRIES:
+                metrics.gpt_retries.inc(kind="single")
                 print(f"    ⚠️ GPT 재시도 {attempt+1}/{OPENAI_RETRIES}", flush=True)
                 time.sleep(1)
             else:
@@ -342,6 +950,88 @@ bearish_idx는 악재 근거가 되는 헤드라인 번호
     
     return rule_based_summary(stock_name, rate, headlines)
 
+def summarize_news_batch_with_gpt(entries: List[Tuple[str, str, List[dict]]]) -> Dict[str, dict]:
+    """캐시 미스 종목 전체를 GPT 한 번 호출로 요약
+    
+    entries: (종목명, 등락률, 헤드라인) 목록
+    반환: 응답에 포함된 종목만 {종목명: 요약 결과}. 누락/실패 종목은 호출자가 폴백 처리.
+    """
+    client = _get_openai_client()
+    if client is None or not entries:
+        return {}
+    
+    # 종목별 블록 (id로 응답 매핑)
+    blocks = []
+    for stock_id, (stock_name, rate, headlines) in enumerate(entries, 1):
+        blocks.append(
+            f"[id={stock_id}] 종목: {stock_name} / 등락률: {rate}\n"
+            f"{_format_headlines(headlines)}"
+        )
+    stocks_text = "\n\n".join(blocks)
+    
+    user_prompt = f"""
+아래 {len(entries)}개 종목 각각에 대해 오늘 뉴스 헤드라인을 분석하라.
+
+{stocks_text}
+
+아래 JSON 형식으로만 출력하라 (모든 id 포함):
+{{
+  "stocks": [
+    {{"id": 1, "bullish": "호재 내용 한 줄", "bearish": "악재 내용 한 줄", "bullish_idx": 1, "bearish_idx": 2}}
+  ]
+}}
+
+bullish_idx는 해당 종목 목록에서 호재 근거가 되는 헤드라인 번호 (1부터 시작)
+bearish_idx는 악재 근거가 되는 헤드라인 번호
+근거가 없으면 해당 idx는 null로 설정
+"""
+    
+    print(f"    🧠 GPT 일괄 요약: {len(entries)}개 종목", flush=True)
+    
+    # 실패 시 재시도 없이 종목별 호출로 폴백
+    started = None
+    try:
+        with _gpt_slots:
+            started = time.perf_counter()
+            response = client.chat.completions.create(
+                model=OPENAI_MODEL,
+                temperature=0.3,
+                max_tokens=120 * len(entries) + 50,
+                timeout=OPENAI_BATCH_TIMEOUT,
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": GPT_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt}
+                ]
+            )
+        metrics.gpt_call_seconds.observe(time.perf_counter() - started, kind="batch", result="ok")
+        started = None
+        data = _parse_gpt_json(response.choices[0].message.content)
+    except Exception as e:
+        if started is not None:
+            metrics.gpt_call_seconds.observe(time.perf_counter() - started, kind="batch", result="error")
+        print(f"    ⚠️ GPT 일괄 요약 실패: {e}", flush=True)
+        return {}
+    
+    results: Dict[str, dict] = {}
+    items = data.get("stocks", []) if isinstance(data, dict) else []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        stock_id = item.get("id")
+        if not isinstance(stock_id, int) or not 1 <= stock_id <= len(entries):
+            continue
+        if not item.get("bullish") and not item.get("bearish"):
+            continue
+        stock_name, _, headlines = entries[stock_id - 1]
+        results[stock_name] = _build_gpt_result(item, headlines)
+    
+    missing = len(entries) - len(results)
+    if missing:
+        print(f"    ⚠️ 일괄 응답 누락 {missing}개 - 종목별 폴백", flush=True)
+    
+    return results
+
 # =========================
 # 규칙 기반 요약 (폴백)
 # =========================
@@ -383,19 +1073,15 @@ def rule_based_summary(stock_name: str, rate: str, headlines: List[dict]) -> dic
         "summary": f"🟢 호재: {bullish}\n🔴 악재: {bearish}",
         "bullish_url": bull_url,
         "bearish_url": bear_url,
-        "sources": headlines
+        "sources": headlines,
+        "summarizer": "rule"
     }
 
 # =========================
 # 뉴스 수집 및 요약 (캐시 포함)
 # =========================
-def get_news_summary_cached(stock_name: str, rate: str) -> dict:
-    """캐시를 활용한 뉴스 요약"""
-    # 캐시 확인
-    cached = news_cache.get(stock_name)
-    if cached:
-        return cached
-    
+def _fetch_news_summary(stock_name: str, rate: str) -> dict:
+    """RSS 수집 → 헤드라인 지문 재검증 → GPT(또는 규칙 기반) 요약 → 캐시 저장"""
     print(f"    🔍 새로운 뉴스 검색: {stock_name}", flush=True)
     
     # Google News에서 뉴스 수집
@@ -403,23 +1089,387 @@ def get_news_summary_cached(stock_name: str, rate: str) -> dict:
     if headlines:
         print(f"    📰 {len(headlines)}개 뉴스 발견", flush=True)
     
+    # 헤드라인이 지난번과 같으면 기존 요약 재사용
+    fingerprint = headline_fingerprint(headlines)
+    reused = news_cache.revalidate(stock_name, fingerprint)
+    if reused:
+        return reused
+    
     # GPT로 요약 또는 규칙 기반 요약
     result = summarize_news_with_gpt(stock_name, rate, headlines)
     
     # 캐시 저장
-    news_cache.set(stock_name, result)
+    news_cache.set(stock_name, result, fingerprint)
     
     return result
 
 # =========================
-# 토스 데이터 파싱
+# 종목별 온디맨드 요약 (/api/news/<종목명>)
 # =========================
-def parse_toss_stocks(soup):
-    """토스 페이지에서 급등주 데이터 추출"""
+# 같은 종목 동시 미스는 한 번의 RSS/GPT로 합침 (프로세스 내: Future 공유, 프로세스 간: 종목별 flock)
+_news_flights: Dict[str, Future] = {}
+_news_flights_lock = threading.Lock()
+
+@contextmanager
+def _news_lookup_lock(stock_name: str):
+    """다른 워커 프로세스의 같은 종목 요약과 배타 (NEWS_LOOKUP_LOCK_DIR이 비면 생략)
+    
+    락 파일은 종목명 해시로 NEWS_LOOKUP_LOCK_BUCKETS개에 나눠 씀 (파일 수 고정, 드물게 다른 종목끼리 대기)
+    """
+    if not NEWS_LOOKUP_LOCK_DIR:
+        yield
+        return
+    
+    bucket = int(hashlib.sha1(stock_name.encode("utf-8")).hexdigest(), 16) % NEWS_LOOKUP_LOCK_BUCKETS
+    fd = os.open(os.path.join(NEWS_LOOKUP_LOCK_DIR, f"hot-cheetos-news-{bucket:02d}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # 닫으면 락도 풀림
+
+def lookup_news(stock_name: str, rate: str = "", known: bool = False) -> Tuple[Optional[dict], str]:
+    """종목 요약 조회 → (요약, 출처)
+    
+    출처: cache(메모리/DB 캐시), coalesced(진행 중이던 같은 종목 요약을 기다림), fetched(새로 요약),
+    unknown(요약 없음 - None 반환)
+    RSS/GPT 비용이 드는 새 요약은 known(호출 측이 아는 종목: 현재/과거 순위)이거나
+    캐시에 보관 중인 종목만 - 임의의 이름으로 유료 호출을 일으키지 못하게 함
+    """
+    cached = news_cache.get(stock_name)
+    if cached:
+        metrics.news_lookups.inc(result="cache")
+        return cached, "cache"
+    
+    if not known and not news_cache.known(stock_name):
+        metrics.news_lookups.inc(result="unknown")
+        return None, "unknown"
+    
+    with _news_flights_lock:
+        flight = _news_flights.get(stock_name)
+        leader = flight is None
+        if leader:
+            flight = _news_flights[stock_name] = Future()
+    
+    if not leader:
+        metrics.news_lookups.inc(result="coalesced")
+        return flight.result(timeout=NEWS_LOOKUP_TIMEOUT), "coalesced"
+    
+    try:
+        with _news_lookup_lock(stock_name):
+            # 락을 기다리는 동안 다른 프로세스가 저장했으면 DB에서 바로 읽힘
+            cached = news_cache.get(stock_name)
+            source = "cache" if cached else "fetched"
+            result = cached or _fetch_news_summary(stock_name, rate)
+        flight.set_result(result)
+    except BaseException as e:
+        metrics.news_lookups.inc(result="error")
+        flight.set_exception(e)
+        raise
+    finally:
+        with _news_flights_lock:
+            _news_flights.pop(stock_name, None)
+    
+    metrics.news_lookups.inc(result=source)
+    return result, source
+
+# =========================
+# 뉴스 병렬 수집 (전 종목)
+# =========================
+# 만료 직후(유예 구간) 항목 백그라운드 갱신 - 사이클 임계 경로 밖에서 실행
+_refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="news-refresh")
+_refreshing: set = set()
+_refreshing_lock = threading.Lock()
+
+def _schedule_refresh(rows: List[dict]):
+    """유예 구간 항목 갱신 예약 (이미 갱신 중인 종목은 제외)"""
+    with _refreshing_lock:
+        todo = [row for row in rows if row["name"] not in _refreshing]
+        _refreshing.update(row["name"] for row in todo)
+    if not todo:
+        return
+    
+    print(f"    🔄 백그라운드 갱신 예약: {', '.join(row['name'] for row in todo)}", flush=True)
+    try:
+        _refresh_executor.submit(_background_refresh, todo)
+    except RuntimeError:
+        # 인터프리터 종료 중이면 다음 사이클에서 동기 갱신
+        with _refreshing_lock:
+            _refreshing.difference_update(row["name"] for row in todo)
+
+def _background_refresh(rows: List[dict]):
+    try:
+        with metrics.stage_seconds.time(stage="background_refresh"):
+            _refresh_news(rows, list(range(len(rows))))
+        metrics.news_refreshes.inc(len(rows), result="ok")
+    except Exception as e:
+        metrics.news_refreshes.inc(len(rows), result="error")
+        print(f"  ❌ 백그라운드 뉴스 갱신 실패: {e}", flush=True)
+    finally:
+        with _refreshing_lock:
+            _refreshing.difference_update(row["name"] for row in rows)
+
+def _enrich_tier(row: dict) -> str:
+    """순위별 요약 예산: gpt(GPT 요약) / rss(RSS + 규칙 기반) / cache(캐시에 있을 때만)"""
+    rank = row.get("rank") or 0
+    if rank <= ENRICH_GPT_DEPTH:
+        return "gpt"
+    if rank <= ENRICH_RSS_DEPTH:
+        return "rss"
+    return "cache"
+
+def _needs_gpt_upgrade(row: dict, value: dict) -> bool:
+    """하위 순위에서 규칙 기반으로 만든 요약이 GPT 구간으로 올라온 경우
+    
+    순위 구간 때문에 GPT를 건너뛴 요약("rule_tier")만 해당 - GPT 실패로 대체된 요약("rule")은
+    다른 항목처럼 TTL 동안 캐시를 써야 장애 중 매 사이클 RSS/GPT 재시도가 반복되지 않음
+    """
+    return (
+        _enrich_tier(row) == "gpt"
+        and value.get("summarizer") == "rule_tier"
+        and bool(value.get("sources"))
+        and _get_openai_client() is not None
+    )
+
+def _collect_news_results(rows: List[dict], indices: List[int],
+                          on_results: Optional[Callable[[Dict[int, dict]], None]] = None) -> Dict[int, dict]:
+    """캐시 확인(유예 구간은 즉시 반환 + 백그라운드 갱신) → 미스 종목만 동기 수집
+    
+    상위 순위부터 예산 배분: ENRICH_GPT_DEPTH까지 GPT, ENRICH_RSS_DEPTH까지 규칙 기반,
+    그 아래는 캐시에 있을 때만 요약을 붙인다.
+    """
+    results: Dict[int, dict] = {}
+    misses: List[int] = []
+    stale: List[int] = []
+    
+    # 1. 캐시 확인 (순위순)
+    for i in sorted(indices, key=lambda i: rows[i].get("rank") or 0):
+        cached = news_cache.get(rows[i]["name"], on_stale=lambda _, i=i: stale.append(i))
+        if cached and not _needs_gpt_upgrade(rows[i], cached):
+            results[i] = cached
+        elif _enrich_tier(rows[i]) != "cache":
+            misses.append(i)
+    
+    stale = [i for i in stale if i in results and _enrich_tier(rows[i]) != "cache"]
+    
+    if stale:
+        _schedule_refresh([{"rank": rows[i]["rank"], "name": rows[i]["name"], "rate": rows[i]["rate"]} for i in stale])
+    
+    if misses:
+        results.update(_refresh_news(rows, misses, on_results))
+    return results
+
+def _refresh_news(rows: List[dict], misses: List[int],
+                  on_results: Optional[Callable[[Dict[int, dict]], None]] = None) -> Dict[int, dict]:
+    """RSS 병렬 수집 → 헤드라인 지문 재검증 → GPT 일괄 요약 → 누락분만 종목별 폴백 → 캐시 저장
+    
+    on_results({인덱스: 요약}): 새 요약이 나올 때마다 호출 (2단계 발행용)
+    """
+    results: Dict[int, dict] = {}
+    misses = list(misses)
+    
+    def emit(chunk: Dict[int, dict]):
+        if on_results is not None and chunk:
+            on_results(chunk)
+    
+    workers = max(1, min(ENRICH_WORKERS, len(misses)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="enrich") as pool:
+        # 1. 캐시 미스 종목 RSS 병렬 수집
+        headlines_by_index: Dict[int, List[dict]] = {}
+        futures = {}
+        for i in misses:
+            print(f"    🔍 새로운 뉴스 검색: {rows[i]['name']}", flush=True)
+            futures[pool.submit(fetch_google_news, rows[i]["name"])] = i
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                headlines_by_index[i] = future.result()
+            except Exception as e:
+                print(f"  ❌ {rows[i]['name']} 뉴스 수집 실패: {e}", flush=True)
+                headlines_by_index[i] = []
+        
+        # 2. 헤드라인이 지난번과 같은 종목은 기존 요약 재사용 (GPT 생략)
+        fingerprints = {i: headline_fingerprint(headlines_by_index[i]) for i in misses}
+        for i in list(misses):
+            reused = news_cache.revalidate(rows[i]["name"], fingerprints[i])
+            if reused and not _needs_gpt_upgrade(rows[i], reused):
+                results[i] = reused
+                misses.remove(i)
+        
+        # 3. GPT 구간 밖 순위는 규칙 기반 요약만 (GPT 비용은 상위 순위에 사용)
+        summarized: Dict[int, dict] = {}
+        for i in list(misses):
+            if _enrich_tier(rows[i]) != "gpt":
+                summarized[i] = {
+                    **rule_based_summary(rows[i]["name"], rows[i]["rate"], headlines_by_index[i]),
+                    "summarizer": "rule_tier"  # 상위 순위로 올라오면 GPT로 갱신
+                }
+                misses.remove(i)
+        emit(dict(summarized))
+        
+        # 4. GPT 일괄 요약 (2개 이상일 때만 의미 있음)
+        if OPENAI_BATCH and len(misses) > 1:
+            entries = [(rows[i]["name"], rows[i]["rate"], headlines_by_index[i]) for i in misses]
+            batch = summarize_news_batch_with_gpt(entries)
+            batch_results = {i: batch[rows[i]["name"]] for i in misses if rows[i]["name"] in batch}
+            summarized.update(batch_results)
+            emit(batch_results)
+        
+        # 5. 일괄 응답이 덮지 못한 종목만 종목별 요약 (내부에서 규칙 기반 폴백)
+        futures = {
+            pool.submit(summarize_news_with_gpt, rows[i]["name"], rows[i]["rate"], headlines_by_index[i]): i
+            for i in misses if i not in summarized
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                summarized[i] = future.result()
+            except Exception as e:
+                print(f"  ❌ {rows[i]['name']} 뉴스 요약 실패: {e}", flush=True)
+                summarized[i] = rule_based_summary(rows[i]["name"], rows[i]["rate"], headlines_by_index[i])
+            emit({i: summarized[i]})
+    
+    # 6. 캐시 저장 (지문과 함께)
+    for i, result in summarized.items():
+        news_cache.set(rows[i]["name"], result, fingerprints[i])
+        results[i] = result
+    
+    return results
+
+NEWS_PENDING_SUMMARY = "🟢 호재: 뉴스 분석 중…\n🔴 악재: 뉴스 분석 중…"
+
+def _summary_fields(news_result: dict) -> dict:
+    """발행 항목에 들어가는 요약 필드"""
+    return {
+        "summary": news_result["summary"],
+        "bullish_url": news_result.get("bullish_url", ""),
+        "bearish_url": news_result.get("bearish_url", ""),
+        "sources": news_result.get("sources", [])
+    }
+
+def _stock_entry(row: dict, news_result: dict) -> dict:
+    return {
+        "rank": row["rank"],
+        "name": row["name"],
+        "price": row["price"],
+        "rate": row["rate"],
+        **_summary_fields(news_result)
+    }
+
+def preliminary_stocks(rows: List[dict]) -> List[dict]:
+    """요약 전 1단계 발행용 목록: 보관 중인 요약(만료 포함)이 있으면 사용, 없으면 '분석 중'"""
+    stocks = []
+    for row in rows:
+        if "summary" in row:
+            stocks.append(row)
+            continue
+        
+        news_result = news_cache.peek(row["name"])
+        if news_result is None:
+            if _enrich_tier(row) == "cache":
+                news_result = rule_based_summary(row["name"], row["rate"], [])  # 최종 결과와 동일
+            else:
+                news_result = {"summary": NEWS_PENDING_SUMMARY}
+        stocks.append(_stock_entry(row, news_result))
+    return stocks
+
+def enrich_stocks(rows: List[dict], on_results: Optional[Callable[[List[dict]], None]] = None) -> List[dict]:
+    """종목별 뉴스 요약 붙이기
+    
+    - RSS는 병렬, GPT는 캐시 미스 종목을 한 번에 일괄 요약
+    - 결과는 입력 순서(순위) 그대로 유지
+    - 한 종목 실패가 다른 종목에 영향 없음 (규칙 기반 요약으로 대체)
+    - 이미 summary가 있는 행(파싱 실패 기본값 등)은 그대로 통과
+    - on_results([{"name", "summary", ...}]): 새로 만든 요약을 완료되는 대로 전달 (2단계 발행)
+    """
+    pending = [i for i, row in enumerate(rows) if "summary" not in row]
+    
+    def emit(chunk: Dict[int, dict]):
+        try:
+            on_results([{"name": rows[i]["name"], **_summary_fields(r)} for i, r in chunk.items()])
+        except Exception as e:
+            print(f"  ⚠️ 요약 중간 발행 실패: {e}", flush=True)
+    
+    try:
+        with metrics.stage_seconds.time(stage="enrich"):
+            collected = _collect_news_results(rows, pending, emit if on_results else None)
+    except Exception as e:
+        print(f"  ❌ 뉴스 수집 단계 실패: {e}", flush=True)
+        collected = {}
+    
+    results: List[Optional[dict]] = [None] * len(rows)
+    for i in pending:
+        results[i] = collected.get(i) or rule_based_summary(rows[i]["name"], rows[i]["rate"], [])
+    
     stocks = []
+    for row, news_result in zip(rows, results):
+        if news_result is None:
+            stocks.append(row)
+            continue
+        
+        stocks.append(_stock_entry(row, news_result))
+        
+        # 요약 출력
+        print(f"  {row['rank']}. {row['name']}", flush=True)
+        for line in news_result["summary"].split('\n'):
+            print(f"    {line}", flush=True)
+    
+    return stocks
+
+def enrich_rankings(rankings: Dict[str, List[dict]],
+                    on_results: Optional[Callable[[List[dict]], None]] = None) -> Dict[str, List[dict]]:
+    """여러 랭킹의 종목을 합쳐 한 번만 요약하고 랭킹별 목록으로 되돌림
+    
+    - 여러 랭킹에 겹치는 종목은 RSS/GPT/캐시 조회를 한 번만 함
+    - 요약 등급(_enrich_tier)은 종목이 가장 높이 오른 순위 기준
+    """
+    best: Dict[str, dict] = {}
+    for rows in rankings.values():
+        for row in rows:
+            if "summary" in row:
+                continue
+            current = best.get(row["name"])
+            if current is None or row["rank"] < current["rank"]:
+                best[row["name"]] = row
+    
+    union = sorted(best.values(), key=lambda row: row["rank"])
+    summaries = {stock["name"]: stock for stock in enrich_stocks(union, on_results)}
+    
+    return {
+        key: [row if "summary" in row or row["name"] not in summaries else _stock_entry(row, summaries[row["name"]])
+              for row in rows]
+        for key, rows in rankings.items()
+    }
+
+# =========================
+# 토스 데이터 파싱
+# =========================
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+TOSS_NAME_SELECTORS = [
+    'span[class*="60z0ev1"]',
+    'a[href*="/stocks/"]',
+    'span[class*="stock-name"]',
+    'td:nth-child(2) span'
+]
+
+def make_toss_soup(page_source: str) -> BeautifulSoup:
+    """랭킹 테이블만 파싱 (lxml 우선), 테이블이 없으면 전체 문서 파싱"""
+    soup = BeautifulSoup(page_source, HTML_PARSER, parse_only=SoupStrainer('table'))
+    if soup.select_one(RANKING_ROW_SELECTOR) or soup.select_one('tbody tr'):
+        return soup
+    return BeautifulSoup(page_source, HTML_PARSER)
+
+def parse_toss_rows(soup, limit: int = TOSS_RANK_DEPTH) -> List[dict]:
+    """토스 페이지에서 순위/종목명/가격/등락률 추출 (뉴스 제외)"""
+    rows_data = []
     
     # 토스 랭킹 행 찾기
-    rows = soup.select('tr[data-tossinvest-log="RankingListRow"]')
+    rows = soup.select(RANKING_ROW_SELECTOR)
     
     if not rows:
         print("⚠️ 기본 셀렉터 실패, tbody tr 시도", flush=True)
@@ -427,19 +1477,15 @@ def parse_toss_stocks(soup):
     
     print(f"📊 {len(rows)}개 종목 발견", flush=True)
     
-    for i, row in enumerate(rows[:10], 1):
+    # 페이지 전체에서 한 번도 매칭되지 않는 셀렉터는 행마다 시도하지 않음
+    name_selectors = [sel for sel in TOSS_NAME_SELECTORS if soup.select_one(sel)]
+    
+    for i, row in enumerate(rows[:limit], 1):
         try:
             # 종목명 추출
             name = ""
             
             # 여러 셀렉터 시도
-            name_selectors = [
-                'span[class*="60z0ev1"]',
-                'a[href*="/stocks/"]',
-                'span[class*="stock-name"]',
-                'td:nth-child(2) span'
-            ]
-            
             for selector in name_selectors:
                 elem = row.select_one(selector)
                 if elem:
@@ -449,10 +1495,12 @@ def parse_toss_stocks(soup):
                         name = text
                         break
             
+            # 행의 span 텍스트는 한 번만 추출해 이름/가격/등락률에 공용
+            span_texts = [span.get_text(strip=True) for span in row.find_all('span')]
+            
             # 여전히 못 찾았으면 모든 span 검색
             if not name:
-                for span in row.select('span'):
-                    text = span.get_text(strip=True)
+                for text in span_texts:
                     # 가격이나 퍼센트가 아닌 텍스트 찾기
                     if text and not any(x in text for x in ['%', '원', ',']) and len(text) > 1:
                         name = text
@@ -462,10 +1510,7 @@ def parse_toss_stocks(soup):
             price = "0원"
             rate = "+0.0%"
             
-            # 숫자가 포함된 span들 찾기
-            price_spans = row.select('span')
-            for span in price_spans:
-                text = span.get_text(strip=True)
+            for text in span_texts:
                 if '원' in text and price == "0원":
                     price = text
                 elif '%' in text and rate == "+0.0%":
@@ -481,28 +1526,17 @@ def parse_toss_stocks(soup):
             
             print(f"  {i}. {name} - {price} ({rate})", flush=True)
             
-            # 실제 뉴스 요약 가져오기 (캐시 활용)
-            news_result = get_news_summary_cached(name, rate)
-            
-            stocks.append({
+            rows_data.append({
                 "rank": i,
                 "name": name,
                 "price": price,
-                "rate": rate,
-                "summary": news_result["summary"],
-                "bullish_url": news_result.get("bullish_url", ""),
-                "bearish_url": news_result.get("bearish_url", ""),
-                "sources": news_result.get("sources", [])
+                "rate": rate
             })
             
-            # 요약 출력
-            for line in news_result["summary"].split('\n'):
-                print(f"    {line}", flush=True)
-            
         except Exception as e:
             print(f"  ❌ {i}번 종목 파싱 오류: {e}", flush=True)
             # 오류 시 기본값
-            stocks.append({
+            rows_data.append({
                 "rank": i,
                 "name": f"종목{i}",
                 "price": "0원",
@@ -513,76 +1547,394 @@ def parse_toss_stocks(soup):
                 "sources": []
             })
     
-    return stocks
+    return rows_data
+
+def parse_toss_stocks(soup):
+    """토스 페이지에서 급등주 데이터 추출"""
+    rows_data = parse_toss_rows(soup)
+    
+    # 실제 뉴스 요약 가져오기 (캐시 활용, 병렬)
+    return enrich_stocks(rows_data)
 
 # =========================
-# 토스 크롤링 메인
+# 페이지 준비 대기 (신호 기반)
 # =========================
-def crawl_toss():
-    """토스 급등주 페이지 크롤링"""
-    print("\n🔍 토스 크롤링 시작", flush=True)
+RANKING_ROW_SELECTOR = 'tr[data-tossinvest-log="RankingListRow"]'
+
+# 마지막 크롤링의 단계별 소요시간(초)
+last_crawl_timings: Dict[str, float] = {}
+
+def _wait_until_stable(driver, script: str, quiet_seconds: float, deadline: float) -> bool:
+    """스크립트 반환값이 quiet_seconds 동안 변하지 않을 때까지 폴링"""
+    last_value = driver.execute_script(script)
+    last_change = time.monotonic()
+    
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        value = driver.execute_script(script)
+        now = time.monotonic()
+        if value != last_value:
+            last_value = value
+            last_change = now
+        elif now - last_change >= quiet_seconds:
+            return True
+    
+    return False
+
+def wait_for_ranking_ready(driver, timeout: float = PAGE_READY_TIMEOUT) -> Dict[str, float]:
+    """랭킹 행 등장 → 행 수 안정화 → 네트워크 유휴 순으로 대기
     
-    driver = None
+    고정 sleep 대신 실제 신호를 기다리며, 단계별 소요시간(초)을 반환한다.
+    전체 대기는 timeout을 넘지 않는다.
+    """
+    timings: Dict[str, float] = {}
+    deadline = time.monotonic() + timeout
     
+    # 1. 랭킹 행 등장
+    stage_start = time.monotonic()
     try:
-        driver = setup_driver()
-        
-        # 토스 급등주 페이지
-        url = 'https://www.tossinvest.com/?live-chart=heavy_soar'
-        print(f"📍 접속: {url}", flush=True)
-        
-        driver.get(url)
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, RANKING_ROW_SELECTOR))
+        )
+    except TimeoutException:
+        timings["rows_visible"] = time.monotonic() - stage_start
+        print(f"⚠️ 랭킹 행 대기 시간 초과 ({timeout:.0f}초)", flush=True)
+        return timings
+    timings["rows_visible"] = time.monotonic() - stage_start
+    
+    # 2. 동적 콘텐츠 로드를 위한 스크롤 후 행 수 안정화
+    stage_start = time.monotonic()
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
+    row_count_script = f"return document.querySelectorAll('{RANKING_ROW_SELECTOR}').length;"
+    if not _wait_until_stable(driver, row_count_script, PAGE_ROW_SETTLE_MS / 1000, deadline):
+        print("⚠️ 행 수 안정화 전에 마감 도달", flush=True)
+    
+    # 목표 순위 수보다 행이 적으면 바닥까지 스크롤하며 추가 로드 (더 늘지 않으면 중단)
+    row_count = driver.execute_script(row_count_script)
+    while row_count < TOSS_RANK_DEPTH and time.monotonic() < deadline:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        _wait_until_stable(driver, row_count_script, PAGE_ROW_SETTLE_MS / 1000, deadline)
+        new_count = driver.execute_script(row_count_script)
+        if new_count <= row_count:
+            break
+        row_count = new_count
+    timings["rows_settled"] = time.monotonic() - stage_start
+    
+    # 3. 네트워크 유휴 (완료된 리소스 요청 수가 더 늘지 않음)
+    stage_start = time.monotonic()
+    network_script = "return performance.getEntriesByType('resource').length;"
+    if not _wait_until_stable(driver, network_script, PAGE_NETWORK_IDLE_MS / 1000, deadline):
+        print("⚠️ 네트워크 유휴 전에 마감 도달", flush=True)
+    timings["network_idle"] = time.monotonic() - stage_start
+    
+    return timings
+
+# =========================
+# 네트워크 응답에서 랭킹 추출 (CDP)
+# =========================
+_NAME_KEYS = ("name", "stockName", "companyName", "productName", "korName", "displayName")
+_PRICE_KEYS = ("price", "currentPrice", "close", "tradePrice", "lastPrice", "closePrice")
+_RATE_KEYS = ("changeRate", "rate", "fluctuationRate", "changePercent", "changeRatio", "returnRate")
+_NESTED_KEYS = ("stock", "product", "item", "price", "priceInfo")
+
+def _pick(item: dict, keys, depth: int = 0):
+    """item(또는 한 단계 중첩 dict)에서 후보 키 값 찾기"""
+    for key in keys:
+        value = item.get(key)
+        if value is not None and not isinstance(value, (dict, list)):
+            return value
+    if depth == 0:
+        for nested_key in _NESTED_KEYS:
+            nested = item.get(nested_key)
+            if isinstance(nested, dict):
+                value = _pick(nested, keys, depth + 1)
+                if value is not None:
+                    return value
+    return None
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(str(value).replace(',', '').replace('%', '').replace('원', ''))
+    except (TypeError, ValueError):
+        return None
+
+def _extract_ranking_items(items: list) -> List[dict]:
+    """dict 목록에서 (name, price, rate) 추출 - 대부분 항목이 맞아야 랭킹으로 인정"""
+    extracted = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        name = _pick(item, _NAME_KEYS)
+        price = _to_float(_pick(item, _PRICE_KEYS))
+        rate = _to_float(_pick(item, _RATE_KEYS))
+        if isinstance(name, str) and name.strip() and price is not None and rate is not None:
+            extracted.append({"name": name.strip(), "price": price, "rate": rate})
+    
+    if len(extracted) < max(3, len(items) * 0.8):
+        return []
+    return extracted
+
+def _find_ranking_list(obj, depth: int = 0) -> List[dict]:
+    """JSON 트리에서 랭킹으로 보이는 가장 긴 목록 찾기"""
+    best: List[dict] = []
+    if depth > 6:
+        return best
+    
+    if isinstance(obj, list):
+        if len(obj) >= 3 and all(isinstance(x, dict) for x in obj):
+            best = _extract_ranking_items(obj)
+        children = obj if not best else []
+    elif isinstance(obj, dict):
+        children = list(obj.values())
+    else:
+        children = []
+    
+    for child in children:
+        if isinstance(child, (list, dict)):
+            found = _find_ranking_list(child, depth + 1)
+            if len(found) > len(best):
+                best = found
+    return best
+
+def _read_ranking_responses(driver) -> List[dict]:
+    """성능 로그의 JSON 응답 중 랭킹 후보 본문에서 목록 추출"""
+    best: List[dict] = []
+    
+    for entry in driver.get_log('performance'):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        if message.get("method") != "Network.responseReceived":
+            continue
         
-        # 페이지 로드 대기
-        time.sleep(5)
+        params = message.get("params", {})
+        response = params.get("response", {})
+        url = response.get("url", "")
+        if "json" not in response.get("mimeType", ""):
+            continue
+        if TOSS_RANKING_URL_HINTS and not any(h in url for h in TOSS_RANKING_URL_HINTS):
+            continue
         
-        # 동적 콘텐츠 로드를 위한 스크롤
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-        time.sleep(2)
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+            text = body.get("body", "")
+            if body.get("base64Encoded"):
+                text = base64.b64decode(text).decode("utf-8")
+            found = _find_ranking_list(json.loads(text))
+        except Exception:
+            continue
         
-        # 페이지 정보
-        print(f"  제목: {driver.title}", flush=True)
-        print(f"  URL: {driver.current_url}", flush=True)
+        if len(found) > len(best):
+            best = found
+            print(f"  🛰️ 랭킹 응답 발견: {url[:80]} ({len(found)}개)", flush=True)
+    
+    return best
+
+def capture_ranking_from_network(driver, limit: int = TOSS_RANK_DEPTH) -> List[dict]:
+    """네트워크 응답에서 랭킹 행(rank/name/price/rate) 구성
+    
+    첫 행을 화면의 첫 랭킹 행과 대조해 종목명과 등락률 단위(% 또는 비율)를 검증한다.
+    검증 실패 시 빈 목록을 반환해 DOM 파서로 폴백한다.
+    """
+    if not TOSS_CAPTURE_NETWORK:
+        return []
+    
+    try:
+        items = _read_ranking_responses(driver)
+        if not items:
+            return []
         
-        # HTML 파싱
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
+        row_elems = driver.find_elements(By.CSS_SELECTOR, RANKING_ROW_SELECTOR)
+        if not row_elems:
+            return []
+        first_row_text = row_elems[0].text
+    except Exception as e:
+        print(f"  ⚠️ 네트워크 캡처 실패: {e}", flush=True)
+        return []
+    
+    # 종목명 검증
+    if items[0]["name"] not in first_row_text:
+        print("  ⚠️ 네트워크 랭킹이 화면과 불일치 - DOM 파싱 사용", flush=True)
+        return []
+    
+    # 등락률 단위 검증 (화면의 % 값과 비교)
+    shown_rates = [abs(float(x)) for x in re.findall(r'(\d+(?:\.\d+)?)%', first_row_text)]
+    first_rate = abs(items[0]["rate"])
+    if any(abs(r - first_rate) < 0.06 for r in shown_rates):
+        scale = 1
+    elif any(abs(r - first_rate * 100) < 0.06 for r in shown_rates):
+        scale = 100
+    else:
+        print("  ⚠️ 네트워크 등락률 단위 확인 불가 - DOM 파싱 사용", flush=True)
+        return []
+    
+    rows = []
+    for i, item in enumerate(items[:limit], 1):
+        rate_value = item["rate"] * scale
+        rows.append({
+            "rank": i,
+            "name": item["name"],
+            "price": f"{int(round(item['price'])):,}원",
+            "rate": f"{rate_value:+.2f}%"
+        })
+        print(f"  {i}. {rows[-1]['name']} - {rows[-1]['price']} ({rows[-1]['rate']})", flush=True)
+    
+    return rows
+
+# =========================
+# 토스 크롤링 메인
+# =========================
+def _record_timings(timings: Dict[str, float]):
+    last_crawl_timings.clear()
+    last_crawl_timings.update(timings)
+    for stage, seconds in timings.items():
+        metrics.stage_seconds.observe(seconds, stage=stage)
+    print("  ⏱️ " + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items()), flush=True)
+
+def crawl_toss_rows(ranking: str = TOSS_RANKINGS[0]) -> Optional[List[dict]]:
+    """토스 랭킹 페이지에서 순위/종목/가격/등락률만 수집 (뉴스 요약 전)"""
+    print("\n🔍 토스 크롤링 시작", flush=True)
+    
+    try:
+        with driver_pool.session() as driver:
+            # 토스 랭킹 페이지 (기본: 급등주)
+            url = TOSS_LIVE_CHART_URL.format(ranking)
+            print(f"📍 접속: {url}", flush=True)
+            
+            # 이전 세션 사용분 성능 로그 비우기
+            if TOSS_CAPTURE_NETWORK:
+                try:
+                    driver.get_log('performance')
+                except Exception:
+                    pass
+            
+            timings: Dict[str, float] = {}
+            stage_start = time.monotonic()
+            driver.get(url)
+            timings["page_load"] = time.monotonic() - stage_start
+            
+            # 페이지 준비 대기 (랭킹 행/행 수/네트워크 신호)
+            timings.update(wait_for_ranking_ready(driver))
+            
+            _record_timings(timings)
+            
+            # 페이지 정보
+            print(f"  제목: {driver.title}", flush=True)
+            print(f"  URL: {driver.current_url}", flush=True)
+            
+            # 네트워크 응답(JSON)에서 먼저 추출, 없으면 HTML 파싱
+            with metrics.stage_seconds.time(stage="network_capture"):
+                network_rows = capture_ranking_from_network(driver)
+            page_source = None if network_rows else driver.page_source
         
         # 데이터 추출
-        stocks = parse_toss_stocks(soup)
+        if network_rows:
+            print(f"📊 네트워크 응답에서 {len(network_rows)}개 종목 추출", flush=True)
+            return network_rows
         
-        if stocks:
-            print(f"✅ {len(stocks)}개 종목 크롤링 성공", flush=True)
-            
-            # JSON 파일로 저장
-            with open('latest_stocks.json', 'w', encoding='utf-8') as f:
-                json.dump(stocks, f, ensure_ascii=False, indent=2)
-                print("💾 latest_stocks.json 저장 완료", flush=True)
-            
-            return stocks
-        else:
-            print("⚠️ 데이터를 찾을 수 없음", flush=True)
-            return None
+        with metrics.stage_seconds.time(stage="parse"):
+            rows = parse_toss_rows(make_toss_soup(page_source))
+        return rows or None
             
     except Exception as e:
         print(f"❌ 크롤링 실패: {e}", flush=True)
         import traceback
         traceback.print_exc()
         return None
-        
-    finally:
-        if driver:
+
+def crawl_toss_rankings(rankings: List[str]) -> Dict[str, Optional[List[dict]]]:
+    """여러 랭킹을 브라우저 하나의 탭들로 동시에 로드해 각각 파싱 (뉴스 요약 전)
+    
+    탭마다 이동만 시작해 두고(비동기) 순서대로 준비를 기다리므로 로드는 병렬로 진행된다.
+    탭이 여러 개면 CDP 성능 로그가 섞이므로 네트워크 캡처 없이 HTML만 파싱한다.
+    """
+    if len(rankings) == 1:
+        return {rankings[0]: crawl_toss_rows(rankings[0])}
+    
+    print(f"\n🔍 토스 랭킹 {len(rankings)}개 동시 크롤링: {', '.join(rankings)}", flush=True)
+    pages: Dict[str, str] = {}
+    
+    try:
+        with driver_pool.session() as driver:
+            main_handle = driver.current_window_handle
+            handles: Dict[str, str] = {}
+            timings: Dict[str, float] = {}
+            stage_start = time.monotonic()
+            
             try:
-                driver.quit()
-                print("🧹 드라이버 종료", flush=True)
-            except:
-                pass
+                for n, ranking in enumerate(rankings):
+                    if n:
+                        driver.switch_to.new_window('tab')
+                        if TOSS_LIGHT_LOAD:
+                            apply_request_blocking(driver)
+                    handles[ranking] = driver.current_window_handle
+                    driver.execute_script("window.location.href = arguments[0];", TOSS_LIVE_CHART_URL.format(ranking))
+                
+                for ranking, handle in handles.items():
+                    driver.switch_to.window(handle)
+                    for stage, seconds in wait_for_ranking_ready(driver).items():
+                        timings[stage] = max(timings.get(stage, 0.0), seconds)
+                    pages[ranking] = driver.page_source
+                timings["tabs_loaded"] = time.monotonic() - stage_start
+            finally:
+                # 멀티 탭은 성능 로그를 쓰지 않지만 쌓이지 않게 비움
+                if TOSS_CAPTURE_NETWORK:
+                    try:
+                        driver.get_log('performance')
+                    except Exception:
+                        pass
+                
+                # 추가 탭 닫고 첫 탭으로 복귀 (풀 반납 시 첫 탭을 about:blank로 초기화)
+                for handle in handles.values():
+                    if handle != main_handle:
+                        try:
+                            driver.switch_to.window(handle)
+                            driver.close()
+                        except Exception:
+                            pass
+                driver.switch_to.window(main_handle)
+            
+            _record_timings(timings)
+    except Exception as e:
+        print(f"❌ 크롤링 실패: {e}", flush=True)
+        import traceback
+        traceback.print_exc()
+    
+    results: Dict[str, Optional[List[dict]]] = {}
+    for ranking in rankings:
+        if ranking not in pages:
+            results[ranking] = None
+            continue
+        print(f"📊 [{ranking}] 파싱", flush=True)
+        with metrics.stage_seconds.time(stage="parse"):
+            results[ranking] = parse_toss_rows(make_toss_soup(pages[ranking])) or None
+    return results
+
+def save_latest_stocks(stocks: List[dict]):
+    """마지막 크롤링 결과를 JSON 파일로 저장"""
+    with open('latest_stocks.json', 'w', encoding='utf-8') as f:
+        json.dump(stocks, f, ensure_ascii=False, indent=2)
+        print("💾 latest_stocks.json 저장 완료", flush=True)
+
+def crawl_toss():
+    """토스 급등주 페이지 크롤링 + 뉴스 요약"""
+    rows = crawl_toss_rows()
+    stocks = enrich_stocks(rows) if rows else None
+    
+    if stocks:
+        print(f"✅ {len(stocks)}개 종목 크롤링 성공", flush=True)
+        save_latest_stocks(stocks)
+        return stocks
+    
+    print("⚠️ 데이터를 찾을 수 없음", flush=True)
+    return None
 
 # =========================
 # 테스트 데이터 생성
 # =========================
-def generate_test_data():
-    """크롤링 실패 시 사용할 테스트 데이터"""
+def generate_test_rows() -> List[dict]:
+    """크롤링 실패 시 사용할 테스트 종목 (뉴스 요약 전)"""
     print("\n📊 테스트 데이터 생성", flush=True)
     
     test_stocks = [
@@ -608,7 +1960,7 @@ def generate_test_data():
     selected = test_stocks[:10]
     selected.sort(key=lambda x: x['base_rate'], reverse=True)
     
-    stocks = []
+    rows = []
     for i, st in enumerate(selected, 1):
         rate_value = st['base_rate'] + random.uniform(-2, 2)
         rate = f"+{rate_value:.2f}%"
@@ -616,35 +1968,58 @@ def generate_test_data():
         
         print(f"  {i}. {st['name']} - {price} ({rate})", flush=True)
         
-        # 실제 뉴스 요약 가져오기
-        news_result = get_news_summary_cached(st["name"], rate)
-        
-        stocks.append({
+        rows.append({
             "rank": i,
             "name": st["name"],
             "price": price,
-            "rate": rate,
-            "summary": news_result["summary"],
-            "bullish_url": news_result.get("bullish_url", ""),
-            "bearish_url": news_result.get("bearish_url", ""),
-            "sources": news_result.get("sources", [])
+            "rate": rate
         })
-        
-        # 요약 출력
-        for line in news_result["summary"].split('\n'):
-            print(f"    {line}", flush=True)
     
-    return stocks
+    return rows
+
+def generate_test_data():
+    """크롤링 실패 시 사용할 테스트 데이터"""
+    # 실제 뉴스 요약 가져오기 (병렬)
+    return enrich_stocks(generate_test_rows())
 
 # =========================
 # API 전송
 # =========================
-def send_to_api(data):
+# 마지막으로 서버가 받은 버전/목록 (델타 전송 기준)
+_last_sent: Dict[str, object] = {"version": None, "stocks": None, "source": None}
+
+def send_to_api(data, source="crawl"):
+    """API 전송 - 이전 전송이 있으면 변경분(델타)만, 버전 불일치 시 전체 재전송
+    
+    source: "crawl" 또는 "test_data" (서버는 테스트 데이터를 이력에 기록하지 않음)
+    """
     try:
         print(f"\n📤 API 전송: {API_URL}", flush=True)
-        resp = requests.post(API_URL, json=data, timeout=5)
+        
+        params = {"source": source}
+        payload = data
+        if API_DELTA and _last_sent["version"] is not None and _last_sent["source"] == source:
+            delta = compute_delta(_last_sent["stocks"], data)
+            if delta is not None and not any(delta.values()):
+                print("  Δ 변경 없음 - 전송 생략", flush=True)
+                return True
+            if delta is not None:
+                payload = {"base_version": _last_sent["version"], **delta}
+                print(f"  Δ 추가 {len(delta['added'])} / 삭제 {len(delta['removed'])} / 변경 {len(delta['changed'])}", flush=True)
+        
+        with metrics.stage_seconds.time(stage="publish"):
+            resp = http_session.post(API_URL, params=params, json=payload, timeout=5)
+            
+            if resp.status_code == 409 and payload is not data:
+                print("  ⚠️ 서버 버전 불일치 - 전체 목록 재전송", flush=True)
+                metrics.publish_total.inc(mode="http", result="conflict")
+                resp = http_session.post(API_URL, params=params, json=data, timeout=5)
         
         if resp.status_code == 200:
+            _last_sent["version"] = resp.json().get("version")
+            _last_sent["stocks"] = data
+            _last_sent["source"] = source
+            metrics.publish_total.inc(mode="http", result="ok")
             print(f"✅ API 전송 성공 ({len(data)}개 종목)", flush=True)
             return True
         else:
@@ -653,8 +2028,130 @@ def send_to_api(data):
     except Exception as e:
         print(f"❌ API 전송 실패: {e}", flush=True)
     
+    metrics.publish_total.inc(mode="http", result="error")
+    return False
+
+def send_summaries_to_api(items: List[dict]) -> bool:
+    """종목별 뉴스 요약만 전송 (2단계 발행의 두 번째 단계: POST {API_URL}/news)"""
+    try:
+        with metrics.stage_seconds.time(stage="publish_summaries"):
+            resp = http_session.post(f"{API_URL}/news", json={"summaries": items}, timeout=5)
+        
+        if resp.status_code == 200:
+            version = resp.json().get("version")
+            base = _last_sent["version"]
+            if _last_sent["stocks"] is not None and base is not None and version in (base, base + 1):
+                # 서버가 마지막 전송 목록 위에 요약만 얹었음 → 델타 기준 갱신
+                by_name = {item["name"]: item for item in items}
+                _last_sent["stocks"] = [{**stock, **by_name.get(stock["name"], {})} for stock in _last_sent["stocks"]]
+                _last_sent["version"] = version
+            else:
+                _last_sent["version"] = None  # 다음 전송은 전체 목록
+            metrics.publish_total.inc(mode="http_news", result="ok")
+            print(f"  📝 요약 전송: {', '.join(item['name'] for item in items)}", flush=True)
+            return True
+        print(f"❌ 요약 전송 응답 코드: {resp.status_code}", flush=True)
+    except Exception as e:
+        print(f"❌ 요약 전송 실패: {e}", flush=True)
+    
+    metrics.publish_total.inc(mode="http_news", result="error")
+    return False
+
+def send_ranking_to_api(ranking: str, data: List[dict]) -> bool:
+    """기본 외 랭킹 전체 목록 전송 (POST {API_URL}/rankings/<ranking>)"""
+    try:
+        with metrics.stage_seconds.time(stage="publish_ranking"):
+            resp = http_session.post(f"{API_URL}/rankings/{ranking}", json=data, timeout=5)
+        
+        if resp.status_code == 200:
+            metrics.publish_total.inc(mode="http_ranking", result="ok")
+            print(f"  📤 [{ranking}] {len(data)}개 종목 전송", flush=True)
+            return True
+        print(f"❌ [{ranking}] 전송 응답 코드: {resp.status_code}", flush=True)
+    except Exception as e:
+        print(f"❌ [{ranking}] 전송 실패: {e}", flush=True)
+    
+    metrics.publish_total.inc(mode="http_ranking", result="error")
     return False
 
+# =========================
+# 1회 수집 사이클
+# =========================
+def run_cycle(publish_prices: Optional[Callable[[List[dict], str], object]] = None,
+              publish_summaries: Optional[Callable[[List[dict]], object]] = None,
+              publish_ranking: Optional[Callable[[str, List[dict]], object]] = None) -> Tuple[Optional[List[dict]], str]:
+    """캐시 정리 → 토스 크롤링 → 실패 시 테스트 데이터 → 뉴스 요약
+    
+    publish_prices/publish_summaries가 주어지면 2단계 발행 (TWO_PHASE_PUBLISH):
+    파싱 직후 가격 목록을 먼저 발행하고, 요약은 종목별로 완료되는 대로 발행한다.
+    (기본 랭킹(TOSS_RANKINGS 첫 번째) 목록, 결과)를 반환하며 최종 전송은 호출자 몫.
+    결과는 "crawl" 또는 "test_data" - 테스트 데이터는 발행하더라도 실패한 사이클로 취급할 것.
+    publish_prices(stocks, result)로 결과를 함께 넘겨 테스트 데이터가 이력에 섞이지 않게 한다.
+    나머지 랭킹은 publish_ranking(key, stocks)로 이 함수 안에서 발행한다.
+    """
+    started = time.perf_counter()
+    
+    # 캐시 정리
+    news_cache.cleanup()
+    
+    # 토스 크롤링 시도
+    primary = TOSS_RANKINGS[0]
+    crawled: Dict[str, Optional[List[dict]]] = {}
+    result = "crawl"
+    
+    try:
+        crawled = crawl_toss_rankings(TOSS_RANKINGS)
+    except Exception as e:
+        print(f"❌ 크롤링 예외: {e}", flush=True)
+    
+    rows = crawled.get(primary)
+    others = {key: r for key, r in crawled.items() if key != primary and r}
+    
+    # 크롤링 실패 시 테스트 데이터 사용
+    if not rows:
+        print("\n⚠️ 토스 크롤링 실패, 테스트 데이터 사용", flush=True)
+        rows = generate_test_rows()
+        result = "test_data"
+    
+    # 1단계: 가격/순위 먼저 발행
+    on_results = None
+    if TWO_PHASE_PUBLISH and publish_prices and publish_summaries:
+        publish_prices(preliminary_stocks(rows), result)
+        if publish_ranking:
+            for key, other_rows in others.items():
+                publish_ranking(key, preliminary_stocks(other_rows))
+        metrics.stage_seconds.observe(time.perf_counter() - started, stage="time_to_prices")
+        on_results = publish_summaries
+    
+    # 2단계: 뉴스 요약 (랭킹 간 겹치는 종목은 한 번만, 완료되는 대로 on_results)
+    enriched = enrich_rankings({primary: rows, **others}, on_results)
+    data = enriched[primary]
+    
+    if publish_ranking:
+        for key in others:
+            publish_ranking(key, enriched[key])
+    
+    if result == "crawl" and data:
+        print(f"✅ {len(data)}개 종목 크롤링 성공", flush=True)
+        save_latest_stocks(data)
+    
+    metrics.cycle_seconds.observe(time.perf_counter() - started, result=result)
+    return data, result
+
+def print_top_stocks(data: List[dict], count: int = 3):
+    """결과 요약 출력"""
+    print("\n" + "="*60, flush=True)
+    print(f"📈 TOP {count} 급등주:", flush=True)
+    for stock in data[:count]:
+        print(f"\n{stock['rank']}위: {stock['name']} ({stock['rate']})", flush=True)
+        summary_lines = stock['summary'].split('\n')
+        for line in summary_lines:
+            print(f"  {line}", flush=True)
+        if stock.get('bullish_url'):
+            print(f"  ↗ 호재 링크: {stock['bullish_url'][:50]}...", flush=True)
+        if stock.get('bearish_url'):
+            print(f"  ↗ 악재 링크: {stock['bearish_url'][:50]}...", flush=True)
+
 # =========================
 # 메인 실행
 # =========================
@@ -674,38 +2171,13 @@ if __name__ == "__main__":
         else:
             print("⚠️ OpenAI API 키 없음 - 규칙 기반 요약 사용", flush=True)
         
-        # 캐시 정리
-        news_cache.cleanup()
-        
-        # 토스 크롤링 시도
-        data = None
-        
-        try:
-            data = crawl_toss()
-        except Exception as e:
-            print(f"❌ 크롤링 예외: {e}", flush=True)
-        
-        # 크롤링 실패 시 테스트 데이터 사용
-        if not data:
-            print("\n⚠️ 토스 크롤링 실패, 테스트 데이터 사용", flush=True)
-            data = generate_test_data()
+        # 수집 사이클 (가격 먼저 전송, 요약은 완료되는 대로 전송)
+        data, result = run_cycle(send_to_api, send_summaries_to_api, send_ranking_to_api)
         
         # API 전송
         if data:
-            send_to_api(data)
-            
-            # 결과 요약 출력
-            print("\n" + "="*60, flush=True)
-            print("📈 TOP 3 급등주:", flush=True)
-            for stock in data[:3]:
-                print(f"\n{stock['rank']}위: {stock['name']} ({stock['rate']})", flush=True)
-                summary_lines = stock['summary'].split('\n')
-                for line in summary_lines:
-                    print(f"  {line}", flush=True)
-                if stock.get('bullish_url'):
-                    print(f"  ↗ 호재 링크: {stock['bullish_url'][:50]}...", flush=True)
-                if stock.get('bearish_url'):
-                    print(f"  ↗ 악재 링크: {stock['bearish_url'][:50]}...", flush=True)
+            send_to_api(data, result)
+            print_top_stocks(data)
         else:
             print("❌ 전송할 데이터 없음", flush=True)
         
@@ -713,6 +2185,10 @@ if __name__ == "__main__":
         print("✅ 실행 완료", flush=True)
         print("="*60, flush=True)
         
+        # 크롤링 실패(테스트 데이터)는 비정상 종료로 알려 호출 측 백오프가 동작하게 함
+        if result != "crawl":
+            sys.exit(2)
+        
     else:
         # 로컬 테스트 모드
         print("\n" + "="*60)
@@ -734,10 +2210,10 @@ if __name__ == "__main__":
             data = generate_test_data()
             if data:
                 print("\n✅ 테스트 데이터 생성")
-                send_to_api(data)
+                send_to_api(data, "test_data")
         elif choice == "3":
             print(f"\n📦 캐시 상태: {len(news_cache.cache)}개 종목")
-            for stock, (value, ts) in list(news_cache.cache.items())[:5]:
+            for stock, (value, ts, _) in list(news_cache.cache.items())[:5]:
                 age = datetime.now() - ts
                 print(f"  - {stock}: {age.seconds//60}분 전 캐시됨")
         
@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-
+"""
+/api/stocks 응답 스냅샷
+- /api/update 시점에 한 번만 직렬화
+- 강한 ETag + gzip(가능하면 brotli) 본문을 미리 만들어 요청마다 재사용
+- 단조 증가 버전, 원자적 교체, 이전 버전 대비 델타(추가/삭제/변경)
+- 멀티 워커: mmap 공유 파일로 모든 워커가 같은 최신 스냅샷 제공
+"""
+
+import os
+import json
+import gzip
+import mmap
+import time
+import fcntl
+import struct
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def dump_json(payload) -> bytes:
+    """공백 없는 UTF-8 JSON"""
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class EncodedBody:
+    """직렬화된 본문 + 인코딩별 압축본과 강한 ETag (불변)"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+
+        # 인코딩별 본문과 ETag (표현마다 다른 강한 ETag)
+        self.encoded: Dict[str, bytes] = {'gzip': gzip.compress(self.body, compresslevel=6)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(self.body)
+        self.etags: Dict[str, str] = {
+            encoding: f'"{digest}-{encoding}"' for encoding in self.encoded
+        }
+
+    def matches(self, if_none_match) -> bool:
+        """If-None-Match에 이 본문의 어떤 표현이든 포함되면 True"""
+        if not if_none_match:
+            return False
+        candidates = [self.etag] + list(self.etags.values())
+        return any(if_none_match.contains_weak(tag.strip('"')) for tag in candidates)
+
+    def representation(self, accept_encodings):
+        """요청의 Accept-Encoding에 맞는 (본문, 인코딩, ETag)"""
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encoded and accept_encodings[encoding]:
+                return self.encoded[encoding], encoding, self.etags[encoding]
+        return self.body, None, self.etag
+
+
+class Snapshot(EncodedBody):
+    """한 번 직렬화된 주식 데이터 스냅샷 (불변)
+    
+    source: 'crawl'(실제 크롤링) 또는 'test_data'(크롤링 실패 시 대체 데이터)
+    """
+
+    MAX_PAGES = 32  # 스냅샷별로 캐시할 페이지(limit/offset/fields 조합) 수
+
+    def __init__(self, stocks: List[dict], last_update: Optional[str], version: int = 0,
+                 source: str = 'crawl'):
+        self.stocks = stocks
+        self.last_update = last_update
+        self.version = version
+        self.source = source
+        super().__init__(dump_json({
+            'stocks': stocks,
+            'last_update': last_update,
+            'count': len(stocks),
+            'version': version,
+            'source': source
+        }))
+        self._pages: "OrderedDict[tuple, EncodedBody]" = OrderedDict()
+        self._pages_lock = threading.Lock()
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "Snapshot":
+        """직렬화된 본문에서 복원 (같은 본문 → 같은 ETag)"""
+        payload = json.loads(body)
+        return cls(payload['stocks'], payload['last_update'], payload['version'], payload.get('source', 'crawl'))
+
+    def page(self, offset: int = 0, limit: Optional[int] = None,
+             fields: Optional[List[str]] = None) -> EncodedBody:
+        """순위 구간(offset/limit)과 필드 선택을 적용한 본문 (같은 조합은 한 번만 직렬화)"""
+        key = (offset, limit, tuple(fields) if fields else None)
+        with self._pages_lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+                return page
+
+        end = None if limit is None else offset + limit
+        stocks = self.stocks[offset:end]
+        if fields:
+            stocks = [{field: stock[field] for field in fields if field in stock} for stock in stocks]
+
+        page = EncodedBody(dump_json({
+            'stocks': stocks,
+            'last_update': self.last_update,
+            'count': len(stocks),
+            'total': len(self.stocks),
+            'offset': offset,
+            'limit': limit,
+            'version': self.version,
+            'source': self.source
+        }))
+
+        with self._pages_lock:
+            self._pages[key] = page
+            while len(self._pages) > self.MAX_PAGES:
+                self._pages.popitem(last=False)
+        return page
+
+
+# =========================
+# 델타 (종목명 기준)
+# =========================
+def _by_name(stocks: List[dict]) -> Optional[Dict[str, dict]]:
+    """종목명 → 항목 (이름이 중복되면 None: 델타로 표현 불가)"""
+    mapping = {stock.get('name'): stock for stock in stocks}
+    return mapping if len(mapping) == len(stocks) else None
+
+
+def compute_delta(old: List[dict], new: List[dict]) -> Optional[dict]:
+    """old → new 변경분. 종목명이 중복되면 None (전체 전송 필요)"""
+    old_map = _by_name(old)
+    new_map = _by_name(new)
+    if old_map is None or new_map is None:
+        return None
+
+    return {
+        'added': [stock for name, stock in new_map.items() if name not in old_map],
+        'removed': [name for name in old_map if name not in new_map],
+        'changed': [stock for name, stock in new_map.items()
+                    if name in old_map and old_map[name] != stock]
+    }
+
+
+def apply_delta(stocks: List[dict], delta: dict) -> List[dict]:
+    """델타를 적용한 새 목록 (순위순 정렬)"""
+    mapping = _by_name(stocks)
+    if mapping is None:
+        raise ValueError("종목명이 중복된 스냅샷에는 델타를 적용할 수 없습니다")
+
+    for name in delta.get('removed', []):
+        mapping.pop(name, None)
+    for stock in delta.get('added', []) + delta.get('changed', []):
+        mapping[stock['name']] = stock
+
+    return sorted(mapping.values(), key=lambda stock: stock.get('rank', 0))
+
+
+class VersionConflict(Exception):
+    """델타의 기준 버전이 현재 버전과 다름"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"현재 버전은 {current_version}입니다")
+        self.current_version = current_version
+
+
+class SharedSnapshotFile:
+    """여러 워커 프로세스가 공유하는 mmap 스냅샷 파일
+    
+    - 헤더(64바이트): magic, seq(시퀀스 락 카운터), version, 활성 슬롯, 본문 길이
+    - 본문 슬롯 2개(더블 버퍼): 비활성 슬롯에 먼저 쓰고 헤더만 교체
+    - 쓰기는 flock으로 프로세스 간 직렬화, 읽기는 락 없이 seq 전후 비교로 일관성 확인
+    """
+
+    MAGIC = b'HCS1'
+    HEADER = struct.Struct('<4s4xQQII')  # magic, seq, version, slot, length
+    HEADER_SIZE = 64
+    SEQ = struct.Struct('<Q')
+    SEQ_OFFSET = 8
+
+    def __init__(self, path: str, slot_size: int):
+        self.path = path
+        self.slot_size = slot_size
+        self.size = self.HEADER_SIZE + 2 * slot_size
+        self._thread_lock = threading.Lock()  # flock은 같은 프로세스의 스레드끼리는 배제하지 않음
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            # 크기/형식이 다르면 빈 스냅샷(버전 0)으로 초기화
+            valid = os.fstat(self._fd).st_size == self.size
+            if valid:
+                with open(path, 'rb') as f:
+                    valid = f.read(4) == self.MAGIC
+            if not valid:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self.size)
+                os.pwrite(self._fd, self.HEADER.pack(self.MAGIC, 0, 0, 0, 0), 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+        self._mm = mmap.mmap(self._fd, self.size)
+
+    @contextmanager
+    def exclusive(self):
+        """쓰기 구간 (프로세스/스레드 모두 배제)"""
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _read_consistent(self, with_body: bool):
+        """seq가 짝수이고 읽는 동안 바뀌지 않은 (version, body) 반환"""
+        for _ in range(1000):
+            _, seq, version, slot, length = self.HEADER.unpack_from(self._mm, 0)
+            if seq % 2:
+                time.sleep(0)
+                continue
+
+            body = None
+            if with_body and version:
+                offset = self.HEADER_SIZE + slot * self.slot_size
+                body = self._mm[offset:offset + length]
+
+            if self.SEQ.unpack_from(self._mm, self.SEQ_OFFSET)[0] == seq:
+                return version, body
+        raise RuntimeError("공유 스냅샷 헤더를 읽을 수 없습니다")
+
+    def version(self) -> int:
+        """현재 공유 버전 (헤더만 읽음)"""
+        return self._read_consistent(False)[0]
+
+    def read(self):
+        """(버전, 본문 bytes) - 아직 발행된 적 없으면 (0, None)"""
+        return self._read_consistent(True)
+
+    def write(self, version: int, body: bytes):
+        """exclusive() 안에서 호출: 비활성 슬롯에 본문을 쓰고 헤더 교체"""
+        if len(body) > self.slot_size:
+            raise ValueError(f"스냅샷 크기 초과: {len(body)} > {self.slot_size} bytes")
+
+        _, seq, _, slot, _ = self.HEADER.unpack_from(self._mm, 0)
+        new_slot = 1 - slot
+        offset = self.HEADER_SIZE + new_slot * self.slot_size
+        self._mm[offset:offset + len(body)] = body
+
+        self.SEQ.pack_into(self._mm, self.SEQ_OFFSET, seq + 1)  # 홀수: 교체 중
+        self.HEADER.pack_into(self._mm, 0, self.MAGIC, seq + 1, version, new_slot, len(body))
+        self.SEQ.pack_into(self._mm, self.SEQ_OFFSET, seq + 2)  # 짝수: 교체 완료
+
+
+class SnapshotStore:
+    """버전이 매겨진 스냅샷 저장소
+    
+    - 새 스냅샷은 완전히 만든 뒤 참조 하나만 교체 (읽는 쪽은 항상 완성된 스냅샷을 봄)
+    - 최근 keep_versions개 버전을 보관해 ?since= 델타 계산
+    - shared가 있으면 버전/본문의 기준은 공유 파일: 어느 워커가 써도 모든 워커가 sync()로 따라감
+    - on_change(snapshot): 이 프로세스에서 새 스냅샷을 처음 반영할 때마다 호출
+    """
+
+    def __init__(self, keep_versions: int = 32, shared: Optional[SharedSnapshotFile] = None,
+                 on_change: Optional[Callable[[Snapshot], None]] = None):
+        self.keep_versions = keep_versions
+        self.shared = shared
+        self.on_change = on_change
+        self.changed = threading.Condition()  # 새 스냅샷 도착 시 대기자 깨움
+        self.current = Snapshot([], None, 0)
+        self._recent: "OrderedDict[int, Snapshot]" = OrderedDict()
+        self._delta_bodies: Dict[int, bytes] = {}
+        self._sync_thread = None
+        self.sync()
+
+    def _adopt(self, snapshot: Snapshot) -> bool:
+        """더 새 버전이면 현재 스냅샷으로 교체 (원자적 참조 교체)"""
+        with self.changed:
+            if snapshot.version <= self.current.version:
+                return False
+
+            self._recent[self.current.version] = self.current
+            while len(self._recent) > self.keep_versions:
+                self._recent.popitem(last=False)
+            self._delta_bodies = {}
+
+            self.current = snapshot
+            self.changed.notify_all()
+
+        if self.on_change:
+            self.on_change(snapshot)
+        return True
+
+    def _latest_shared(self) -> Snapshot:
+        """공유 파일의 최신 스냅샷 (exclusive() 안에서 호출)"""
+        version, body = self.shared.read()
+        if version == self.current.version:
+            return self.current
+        if body is None:
+            return Snapshot([], None, 0)
+        return Snapshot.from_body(body)
+
+    def publish(self, stocks: List[dict], last_update: str, source: str = 'crawl') -> Snapshot:
+        """전체 목록으로 새 버전 발행"""
+        if self.shared is None:
+            with self.changed:
+                snapshot = Snapshot(stocks, last_update, self.current.version + 1, source)
+                self._adopt(snapshot)
+            return snapshot
+
+        with self.shared.exclusive():
+            snapshot = Snapshot(stocks, last_update, self.shared.version() + 1, source)
+            self.shared.write(snapshot.version, snapshot.body)
+        self._adopt(snapshot)
+        return snapshot
+
+    def _commit(self, build: Callable[[Snapshot], Optional[List[dict]]], last_update: str,
+                source: Optional[str] = None) -> Snapshot:
+        """최신 스냅샷을 잠근 채 build(latest)로 새 목록을 만들어 발행 (None이면 발행 없이 latest 반환)
+        
+        source가 None이면 latest의 출처를 이어받음 (요약 패치 등)
+        """
+        if self.shared is None:
+            with self.changed:
+                latest = self.current
+                stocks = build(latest)
+                if stocks is None:
+                    return latest
+                snapshot = Snapshot(stocks, last_update, latest.version + 1, source or latest.source)
+                self._adopt(snapshot)
+            return snapshot
+
+        with self.shared.exclusive():
+            latest = self._latest_shared()
+            stocks = build(latest)
+            if stocks is None:
+                return latest
+            snapshot = Snapshot(stocks, last_update, latest.version + 1, source or latest.source)
+            self.shared.write(snapshot.version, snapshot.body)
+        self._adopt(snapshot)
+        return snapshot
+
+    def publish_delta(self, delta: dict, last_update: str, source: str = 'crawl') -> Snapshot:
+        """최신 버전 기준 델타로 새 버전 발행 (기준 버전 불일치 시 VersionConflict)"""
+        def build(latest: Snapshot) -> List[dict]:
+            if delta.get('base_version') != latest.version:
+                raise VersionConflict(latest.version)
+            return apply_delta(latest.stocks, delta)
+
+        return self._commit(build, last_update, source)
+
+    def patch(self, updates: Dict[str, dict], last_update: str) -> Snapshot:
+        """종목명별 필드 갱신을 최신 버전에 병합해 발행 (목록에 없는 종목은 무시, 변경 없으면 발행 안 함)"""
+        def build(latest: Snapshot) -> Optional[List[dict]]:
+            stocks = []
+            changed = False
+            for stock in latest.stocks:
+                fields = updates.get(stock.get('name'))
+                if fields and any(stock.get(k) != v for k, v in fields.items()):
+                    stock = {**stock, **fields}
+                    changed = True
+                stocks.append(stock)
+            return stocks if changed else None
+
+        return self._commit(build, last_update)
+
+    def sync(self) -> bool:
+        """공유 파일에 더 새 버전이 있으면 가져오기 (헤더만 비교하므로 저렴)"""
+        if self.shared is None or self.shared.version() <= self.current.version:
+            return False
+
+        version, body = self.shared.read()
+        if body is None or version <= self.current.version:
+            return False
+        return self._adopt(Snapshot.from_body(body))
+
+    def start_sync(self, interval: float):
+        """다른 워커의 발행을 감지하는 폴링 스레드 (SSE 깨우기/이력 기록용)"""
+        if self.shared is None or self._sync_thread is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.sync()
+                except Exception as e:
+                    print(f"⚠️ 스냅샷 동기화 실패: {e}", flush=True)
+                time.sleep(interval)
+
+        self._sync_thread = threading.Thread(target=loop, name="snapshot-sync", daemon=True)
+        self._sync_thread.start()
+
+    def delta_body(self, since: int) -> Optional[bytes]:
+        """since 버전 이후 변경분 JSON. 보관 범위를 벗어나면 None (전체 응답 필요)"""
+        with self.changed:
+            current = self.current
+            if since == current.version:
+                base = current
+            else:
+                base = self._recent.get(since)
+            if base is None:
+                return None
+
+            cached = self._delta_bodies.get(since)
+            if cached is not None:
+                return cached
+
+            delta = compute_delta(base.stocks, current.stocks)
+            if delta is None:
+                return None
+
+            body = dump_json({
+                'version': current.version,
+                'since': since,
+                'last_update': current.last_update,
+                'count': len(current.stocks),
+                **delta
+            })
+            self._delta_bodies[since] = body
+            return body